@@ -0,0 +1,9 @@
+"""
+Benchmarks Package
+
+Offline, deterministic performance harness for the whole pipeline:
+- corpus: synthetic PDF / DOCX / TXT generator
+- fake_openai: local stand-in for the OpenAI embeddings and chat APIs
+- stats: stage timings, percentiles, peak RSS, run comparison
+- run: end-to-end benchmark CLI (python -m benchmarks.run)
+"""
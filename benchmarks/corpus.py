@@ -0,0 +1,195 @@
+"""
+Synthetic corpus generator
+
+Writes PDF, DOCX and TXT files of a configurable size with deterministic,
+seeded text, and samples queries from that text. The formats are written by
+hand (a minimal PDF with one text stream per page, a DOCX zip with just
+word/document.xml) so no extra dependencies are needed, while
+DocumentProcessor still reads them with the production loaders.
+
+Usage:
+    python -m benchmarks.corpus out/ --docs 30 --words 5000 --formats pdf docx txt
+"""
+import argparse
+import random
+import textwrap
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Sequence
+from xml.sax.saxutils import escape
+
+_SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "vo", "shi", "en", "dor", "pa", "qui", "sel", "an", "ti", "mor", "bu"]
+
+_LINES_PER_PAGE = 50
+_LINE_WIDTH = 90
+
+
+@dataclass
+class Corpus:
+    """
+    Attributes:
+        files: Generated file paths
+        queries: Queries sampled from the generated text
+        words: Total words written
+    """
+    files: List[Path] = field(default_factory=list)
+    queries: List[str] = field(default_factory=list)
+    words: int = 0
+
+
+def _vocabulary(rng: random.Random, size: int = 2000) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 4))))
+    vocabulary = sorted(words)
+    rng.shuffle(vocabulary)  # frequency rank independent of spelling
+    return vocabulary
+
+
+def _paragraphs(rng: random.Random, vocabulary: Sequence[str], words: int) -> List[str]:
+    """Sentences of Zipf-ish word frequencies, with an identifier every few sentences"""
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    paragraphs, sentences, written = [], [], 0
+    while written < words:
+        length = rng.randint(8, 20)
+        sentence = rng.choices(vocabulary, weights=weights, k=length)
+        if rng.random() < 0.2:
+            sentence.insert(rng.randrange(length), f"PN-{rng.randint(10000, 99999)}")
+        text = " ".join(sentence)
+        sentences.append(text[0].upper() + text[1:] + ".")
+        written += len(sentence)
+        if len(sentences) >= rng.randint(3, 7):
+            paragraphs.append(" ".join(sentences))
+            sentences = []
+    if sentences:
+        paragraphs.append(" ".join(sentences))
+    return paragraphs
+
+
+def _pdf_string(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, paragraphs: Sequence[str]) -> None:
+    """Minimal PDF 1.4: Helvetica text, one content stream per page"""
+    lines = []
+    for paragraph in paragraphs:
+        lines.extend(textwrap.wrap(paragraph, _LINE_WIDTH))
+        lines.append("")
+    pages = [lines[i:i + _LINES_PER_PAGE] for i in range(0, len(lines), _LINES_PER_PAGE)] or [[]]
+
+    objects = {1: "<< /Type /Catalog /Pages 2 0 R >>", 3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for number, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * number, 5 + 2 * number
+        kids.append(f"{page_id} 0 R")
+        stream = "BT /F1 10 Tf 12 TL 50 792 Td\n" + "".join(
+            f"T* ({_pdf_string(line)}) Tj\n" for line in page_lines
+        ) + "ET"
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        objects[content_id] = f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(output)
+        output += f"{number} 0 obj\n{objects[number]}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for number in sorted(objects):
+        output += f"{offsets[number]:010d} 00000 n \n".encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(bytes(output))
+
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+
+def write_docx(path: Path, paragraphs: Sequence[str]) -> None:
+    """Minimal DOCX: one <w:p> per paragraph, no styles"""
+    body = "".join(f"<w:p><w:r><w:t>{escape(paragraph)}</w:t></w:r></w:p>" for paragraph in paragraphs)
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f"<w:body>{body}</w:body></w:document>")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _RELS)
+        archive.writestr("word/document.xml", document)
+
+
+def write_txt(path: Path, paragraphs: Sequence[str]) -> None:
+    path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+
+_WRITERS = {"pdf": write_pdf, "docx": write_docx, "txt": write_txt}
+
+
+def generate_corpus(out_dir: str, docs: int = 10, words: int = 2000, formats: Sequence[str] = ("pdf", "docx", "txt"),
+                    queries: int = 50, seed: int = 0) -> Corpus:
+    """
+    Write `docs` files of about `words` words each, cycling through `formats`.
+
+    Args:
+        out_dir: Directory to write into (created if missing)
+        docs: Number of files
+        words: Approximate words per file
+        formats: Any of "pdf", "docx", "txt"
+        queries: Number of queries to sample from the text
+        seed: RNG seed - the same seed always gives the same corpus
+
+    Returns:
+        Corpus with the file paths and sampled queries
+    """
+    unknown = set(formats) - set(_WRITERS)
+    if unknown:
+        raise ValueError(f"Unsupported formats: {sorted(unknown)}")
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    corpus = Corpus()
+    sentences = []
+    for number in range(docs):
+        extension = formats[number % len(formats)]
+        paragraphs = _paragraphs(rng, vocabulary, words)
+        path = out / f"doc_{number:04d}.{extension}"
+        _WRITERS[extension](path, paragraphs)
+        corpus.files.append(path)
+        corpus.words += sum(len(paragraph.split()) for paragraph in paragraphs)
+        sentences.extend(sentence for paragraph in paragraphs for sentence in paragraph.split(". "))
+
+    # Queries: the first words of random sentences, as users paraphrase what they read
+    for sentence in rng.sample(sentences, min(queries, len(sentences))):
+        corpus.queries.append(" ".join(sentence.rstrip(".").split()[:8]) + "?")
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic document corpus")
+    parser.add_argument("out_dir")
+    parser.add_argument("--docs", type=int, default=10)
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--formats", nargs="+", default=["pdf", "docx", "txt"], choices=sorted(_WRITERS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.out_dir, args.docs, args.words, args.formats, seed=args.seed)
+    print(f"✅ Wrote {len(corpus.files)} files ({corpus.words} words) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Deterministic stand-in for the OpenAI HTTP API
+
+Serves the two endpoints the pipeline calls:
+- POST /v1/embeddings        vectors from HashingEmbeddings
+- POST /v1/chat/completions  a fixed answer built from the prompt, optionally streamed (SSE)
+
+Responses only depend on the request, so benchmark runs are repeatable and
+cost nothing. Optional artificial latency makes the network share of each
+stage visible without calling the real API.
+
+Usage:
+    with FakeOpenAIServer(embedding_latency_ms=20, token_latency_ms=5):
+        # OPENAI_API_BASE / OPENAI_API_KEY point at the fake server here
+        ...
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from langchain_components.embeddings import HashingEmbeddings
+
+_ENV_VARS = ("OPENAI_API_BASE", "OPENAI_BASE_URL", "OPENAI_API_KEY")
+
+
+def fake_answer(prompt: str, words: int = 40) -> str:
+    """Deterministic answer: the first `words` words of the context in the prompt"""
+    context = prompt.split("Question:")[0]
+    context = context.split("context:", 1)[-1]
+    return " ".join(context.split()[:words]) or "I don't know."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def log_message(self, format, *args):  # keep benchmark output clean
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/embeddings"):
+            self._embeddings(body)
+        elif self.path.endswith("/chat/completions"):
+            self._chat(body)
+        else:
+            self.send_error(404)
+
+    def _send_json(self, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _embeddings(self, body: dict) -> None:
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        # Token-id inputs (tiktoken-encoded by the client) are hashed as words
+        texts = [text if isinstance(text, str) else " ".join(map(str, text)) for text in inputs]
+        embedder = self.server.embedder_for(body.get("dimensions"))
+        time.sleep(self.server.embedding_latency_ms / 1000)
+        vectors = embedder.embed_documents(texts)
+        self._send_json({
+            "object": "list",
+            "model": body.get("model", "text-embedding-3-small"),
+            "data": [{"object": "embedding", "index": i, "embedding": vector} for i, vector in enumerate(vectors)],
+            "usage": {"prompt_tokens": sum(len(text.split()) for text in texts),
+                      "total_tokens": sum(len(text.split()) for text in texts)},
+        })
+
+    def _chat(self, body: dict) -> None:
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        answer = fake_answer(prompt, self.server.answer_words)
+        model = body.get("model", "gpt-4o-mini")
+        time.sleep(self.server.first_token_latency_ms / 1000)
+
+        if not body.get("stream"):
+            time.sleep(self.server.token_latency_ms * len(answer.split()) / 1000)
+            self._send_json({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": answer}}],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(answer.split()),
+                          "total_tokens": len(prompt.split()) + len(answer.split())},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i, word in enumerate(answer.split()):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": None,
+                             "delta": {"role": "assistant", "content": ("" if i == 0 else " ") + word}}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.server.token_latency_ms / 1000)
+        done = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": [{"index": 0, "finish_reason": "stop", "delta": {}}]}
+        self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, dimensions: int, embedding_latency_ms: float, first_token_latency_ms: float,
+                 token_latency_ms: float, answer_words: int):
+        super().__init__(address, _Handler)
+        self.dimensions = dimensions
+        self.embedding_latency_ms = embedding_latency_ms
+        self.first_token_latency_ms = first_token_latency_ms
+        self.token_latency_ms = token_latency_ms
+        self.answer_words = answer_words
+        self._embedders = {}
+
+    def embedder_for(self, dimensions: Optional[int]) -> HashingEmbeddings:
+        dimensions = dimensions or self.dimensions
+        if dimensions not in self._embedders:
+            self._embedders[dimensions] = HashingEmbeddings(dimensions)
+        return self._embedders[dimensions]
+
+
+class FakeOpenAIServer:
+    """
+    Background fake OpenAI server; as a context manager it also points the
+    OpenAI clients at itself through the environment.
+
+    Args:
+        port: Port to listen on (0 = any free port)
+        dimensions: Default embedding size
+        embedding_latency_ms: Added to every embeddings request
+        first_token_latency_ms: Added before the first generated token
+        token_latency_ms: Added per generated token
+        answer_words: Length of generated answers
+    """
+
+    def __init__(self, port: int = 0, dimensions: int = 1536, embedding_latency_ms: float = 0.0,
+                 first_token_latency_ms: float = 0.0, token_latency_ms: float = 0.0, answer_words: int = 40):
+        self._server = _Server(("127.0.0.1", port), dimensions, embedding_latency_ms,
+                               first_token_latency_ms, token_latency_ms, answer_words)
+        self._thread: Optional[threading.Thread] = None
+        self._saved_env = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self.start()
+        self._saved_env = {name: os.environ.get(name) for name in _ENV_VARS}
+        os.environ["OPENAI_API_BASE"] = self.base_url
+        os.environ["OPENAI_BASE_URL"] = self.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-fake"
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for name, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self.stop()
+
+
+if __name__ == "__main__":
+    server = FakeOpenAIServer(port=int(os.getenv("FAKE_OPENAI_PORT", "8765"))).start()
+    print(f"🧪 Fake OpenAI API on {server.base_url} - set OPENAI_API_BASE to use it")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,190 @@
+"""
+End-to-end pipeline benchmark
+
+Generates a synthetic corpus, then times every stage of the production code
+path against deterministic stand-ins (no OpenAI account, no cost):
+
+    load      DocumentProcessor.load_document, per file
+    split     DocumentProcessor.split_documents, per file
+    embed     embeddings.embed_documents, per batch (in-process hashing by
+              default; --embeddings fake-api drives the OpenAI client and
+              scheduler against the fake API)
+    insert    VectorStorageManager.add_documents, per batch - embeddings are
+              cache hits after the embed stage, so this is the storage cost
+    search    VectorStorageManager.similarity_search, per query
+    retrieve  RAGChain retrieval (QueryTiming.retrieval), per question
+    generate  RAGChain generation (total - retrieval), per question
+    first_token  Time to the first streamed token, per question
+
+Results (throughput, p50/p95/p99, peak RSS) are printed and saved as JSON;
+--compare prints the change against an earlier run.
+
+Usage:
+    python -m benchmarks.run --docs 30 --words 3000 --queries 50 --out results/baseline.json
+    python -m benchmarks.run --backend pgvector --compare results/baseline.json --out results/new.json
+    python -m benchmarks.run --embeddings fake-api   # needs tiktoken's BPE file (downloaded on first use)
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .corpus import generate_corpus
+from .fake_openai import FakeOpenAIServer
+from .stats import StageRecorder, compare, peak_rss_mb
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _build_embeddings(kind: str, model: str):
+    """Embedder for the run, wrapped in a fresh memory-only cache so runs don't share hits"""
+    from langchain_components.embedding_cache import CachedEmbeddings, EmbeddingCache
+    from langchain_components.embedding_scheduler import EmbeddingScheduler
+    from langchain_components.embeddings import HashingEmbeddings
+
+    cache = EmbeddingCache(max_entries=1_000_000)
+    if kind == "hashing":
+        return CachedEmbeddings(HashingEmbeddings(), model="hashing", cache=cache)
+
+    from langchain_openai import OpenAIEmbeddings
+
+    # The fake API embeds raw strings; skip client-side tokenization
+    client = OpenAIEmbeddings(model=model, check_embedding_ctx_length=False, max_retries=0)
+    return CachedEmbeddings(EmbeddingScheduler.from_env(client, model=model), model=model, cache=cache)
+
+
+def run_benchmark(args, workdir: Path) -> dict:
+    from langchain_components.document_processor import DocumentProcessor
+    from langchain_components.rag_chain import QueryTiming, RAGChain
+    from langchain_components.vector_store import VectorStorageManager
+
+    recorder = StageRecorder()
+    corpus = generate_corpus(workdir / "corpus", docs=args.docs, words=args.words, formats=args.formats,
+                             queries=args.queries, seed=args.seed)
+
+    with FakeOpenAIServer(embedding_latency_ms=args.embedding_latency_ms,
+                          first_token_latency_ms=args.first_token_latency_ms,
+                          token_latency_ms=args.token_latency_ms):
+        embeddings = _build_embeddings(args.embeddings, "text-embedding-3-small")
+        store = VectorStorageManager(
+            collection_name=f"benchmark_{uuid.uuid4().hex[:8]}",
+            backend=args.backend,
+            embeddings=embeddings,
+            index_path=str(workdir / "index"),
+        )
+        processor = DocumentProcessor(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+        chunks = []
+        for path in corpus.files:
+            with recorder.time("load"):
+                pages = processor.load_document(str(path))
+            with recorder.time("split"):
+                file_chunks = processor.split_documents(pages)
+            chunks.extend(file_chunks)
+
+        batches = [chunks[i:i + args.batch_size] for i in range(0, len(chunks), args.batch_size)]
+        for batch in batches:
+            with recorder.time("embed", items=len(batch)):
+                embeddings.embed_documents([chunk.page_content for chunk in batch])
+        for batch in batches:
+            with recorder.time("insert", items=len(batch)):
+                store.add_documents([chunk.page_content for chunk in batch], [chunk.metadata for chunk in batch])
+
+        for query in corpus.queries:
+            with recorder.time("search"):
+                store.similarity_search(query, k=args.k)
+
+        rag = RAGChain(vector_store=store)
+        for question in corpus.queries[:args.questions]:
+            timing = QueryTiming()
+            asyncio.run(rag.aquery(question, k=args.k, timing=timing))
+            recorder.add("retrieve", timing.retrieval)
+            recorder.add("generate", timing.total - timing.retrieval)
+            if timing.time_to_first_token is not None:
+                recorder.add("first_token", timing.time_to_first_token)
+
+        if args.backend == "pgvector" and not args.keep:
+            store.vector_store.delete_collection()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": vars(args),
+        "corpus": {"files": len(corpus.files), "words": corpus.words, "chunks": len(chunks),
+                   "queries": len(corpus.queries)},
+        "stages": recorder.summary(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion and query pipeline offline")
+    parser.add_argument("--docs", type=int, default=12, help="Files in the synthetic corpus")
+    parser.add_argument("--words", type=int, default=2000, help="Words per file")
+    parser.add_argument("--formats", nargs="+", default=["pdf", "docx", "txt"])
+    parser.add_argument("--queries", type=int, default=50, help="Search queries")
+    parser.add_argument("--questions", type=int, default=20, help="RAG questions (subset of the queries)")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100, help="Chunks per embed / insert call")
+    parser.add_argument("--backend", choices=["local", "pgvector"], default="local")
+    parser.add_argument("--embeddings", choices=["hashing", "fake-api"], default="hashing",
+                        help="hashing: in-process, fully offline; fake-api: real OpenAI client and scheduler "
+                             "against the fake server (tiktoken needs its BPE file)")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--first-token-latency-ms", type=float, default=0.0)
+    parser.add_argument("--token-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Keep the corpus and local index here (default: temporary)")
+    parser.add_argument("--keep", action="store_true", help="Keep the pgvector collection after the run")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        results = run_benchmark(args, Path(args.workdir))
+    else:
+        with tempfile.TemporaryDirectory(prefix="doc-analyser-bench-") as workdir:
+            results = run_benchmark(args, Path(workdir))
+    results["wall_s"] = time.perf_counter() - started
+
+    corpus = results["corpus"]
+    print(f"📚 {corpus['files']} files, {corpus['words']} words, {corpus['chunks']} chunks")
+    print(f"{'stage':<12} {'calls':>6} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MB':>8}")
+    for stage, stats in results["stages"].items():
+        rss = f"{stats['peak_rss_mb']:.0f}" if stats["peak_rss_mb"] is not None else "-"
+        print(f"{stage:<12} {stats['calls']:>6} {stats['throughput_per_s']:>10.1f} {stats['p50_ms']:>9.2f} "
+              f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {rss:>8}")
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(results, indent=2))
+        print(f"💾 Results saved to {args.out}")
+    if args.compare:
+        print(f"\nChange vs {args.compare}:")
+        for line in compare(json.loads(Path(args.compare).read_text()), results):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
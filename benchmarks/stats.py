@@ -0,0 +1,100 @@
+"""
+Stage timings, percentiles, peak memory and run-to-run comparison
+"""
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0.0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class StageRecorder:
+    """
+    Collects one duration per call of each stage, plus how many items
+    (files, chunks, queries) the call processed.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.items: Dict[str, int] = defaultdict(int)
+        self.peak_rss: Dict[str, Optional[float]] = {}
+
+    @contextmanager
+    def time(self, stage: str, items: int = 1):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, items)
+
+    def add(self, stage: str, seconds: float, items: int = 1) -> None:
+        self.durations[stage].append(seconds)
+        self.items[stage] += items
+        self.peak_rss[stage] = peak_rss_mb()
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Returns:
+            Per stage: calls, items, total seconds, items per second,
+            p50/p95/p99 per call in ms and peak RSS (MB) after the stage
+        """
+        result = {}
+        for stage, durations in self.durations.items():
+            total = sum(durations)
+            milliseconds = [duration * 1000 for duration in durations]
+            result[stage] = {
+                "calls": len(durations),
+                "items": self.items[stage],
+                "total_s": total,
+                "throughput_per_s": self.items[stage] / total if total else 0.0,
+                "p50_ms": percentile(milliseconds, 50),
+                "p95_ms": percentile(milliseconds, 95),
+                "p99_ms": percentile(milliseconds, 99),
+                "peak_rss_mb": self.peak_rss.get(stage),
+            }
+        return result
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(baseline: dict, current: dict) -> List[str]:
+    """Human-readable per-stage diff of two saved runs (p50/p95 latency and throughput)"""
+    lines = [f"{'stage':<12} {'p50 ms':>18} {'p95 ms':>18} {'throughput/s':>22}"]
+    for stage, new in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if old is None:
+            lines.append(f"{stage:<12} (new stage)")
+            continue
+        lines.append(
+            f"{stage:<12} "
+            f"{new['p50_ms']:>9.2f} {_change(old['p50_ms'], new['p50_ms']):>8} "
+            f"{new['p95_ms']:>9.2f} {_change(old['p95_ms'], new['p95_ms']):>8} "
+            f"{new['throughput_per_s']:>13.1f} {_change(old['throughput_per_s'], new['throughput_per_s']):>8}"
+        )
+    return lines
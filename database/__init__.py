@@ -1,7 +1,14 @@
 """
 Database package - SQLAlchemy ORM setup
 """
-from .connection import engine, SessionLocal, get_db
+from .connection import (
+    engine, SessionLocal, get_db, get_async_engine, get_async_sessionmaker, get_async_db, pool_metrics
+)
 from .models import Base, Document, DocumentChunk
+from .bulk_insert import BulkChunkWriter, ChunkRow
 
-__all__ = ["engine", "SessionLocal", "get_db", "Base", "Document", "DocumentChunk"]
+__all__ = [
+    "engine", "SessionLocal", "get_db", "get_async_engine", "get_async_sessionmaker", "get_async_db",
+    "pool_metrics", "Base", "Document", "DocumentChunk",
+    "BulkChunkWriter", "ChunkRow",
+]
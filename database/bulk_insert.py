@@ -0,0 +1,187 @@
+"""
+Bulk loading of document chunks with COPY
+
+Row-by-row INSERTs (ORM adds or PGVector.add_documents) send every 1536-float
+vector as text and pay a round-trip per row. This module streams rows through
+`COPY document_chunks ... FROM STDIN WITH (FORMAT binary)` instead:
+- vectors use pgvector's binary wire format (no float -> text -> float)
+- rows are sent in batches, all inside one transaction
+- the vector index can be dropped before and rebuilt after a large load
+
+Usage:
+    from database.bulk_insert import BulkChunkWriter, ChunkRow
+
+    writer = BulkChunkWriter(batch_size=5000)
+    writer.write(rows, rebuild_index=True)
+"""
+import io
+import json
+import struct
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .connection import engine as default_engine
+from .indexes import IndexConfig, build_index, current_index
+
+COPY_COLUMNS = ("document_id", "chunk_text", "chunk_index", "embedding", "metadata", "content_hash")
+
+# PGCOPY signature, flags field, header extension length
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_TRAILER = struct.pack(">h", -1)
+_NULL = struct.pack(">i", -1)
+
+
+class ChunkRow(NamedTuple):
+    document_id: int
+    chunk_text: str
+    chunk_index: int
+    embedding: Optional[List[float]]
+    metadata: Optional[dict] = None
+    content_hash: Optional[str] = None
+
+
+def _field(payload: bytes) -> bytes:
+    return struct.pack(">i", len(payload)) + payload
+
+
+def encode_vector(values: List[float]) -> bytes:
+    """pgvector binary format: int16 dimensions, int16 unused, float4 values (big-endian)"""
+    return struct.pack(f">hh{len(values)}f", len(values), 0, *values)
+
+
+def encode_row(row: ChunkRow, jsonb: bool = False) -> bytes:
+    """Encode one row as a binary COPY tuple"""
+    parts = [struct.pack(">h", len(COPY_COLUMNS))]
+    parts.append(_field(struct.pack(">i", row.document_id)))
+    parts.append(_field(row.chunk_text.encode("utf-8")))
+    parts.append(_field(struct.pack(">i", row.chunk_index)))
+    parts.append(_NULL if row.embedding is None else _field(encode_vector(row.embedding)))
+
+    metadata = json.dumps(row.metadata or {}).encode("utf-8")
+    # jsonb's binary format is a version byte followed by the JSON text
+    parts.append(_field(b"\x01" + metadata if jsonb else metadata))
+
+    parts.append(_NULL if row.content_hash is None else _field(row.content_hash.encode("utf-8")))
+    return b"".join(parts)
+
+
+def _batches(rows: Iterable[ChunkRow], batch_size: int) -> Iterator[List[ChunkRow]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _metadata_is_jsonb(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = %s::regclass AND attname = 'metadata'",
+        (table,)
+    )
+    result = cursor.fetchone()
+    return result is not None and result[0] == "jsonb"
+
+
+def copy_chunk_rows(dbapi_connection, rows: Iterable[ChunkRow], batch_size: int = 5000,
+                    table: str = "document_chunks") -> int:
+    """
+    COPY rows into `table` on an existing DBAPI (psycopg2) connection.
+
+    Does not commit - the caller owns the transaction, so this can run inside
+    an ORM session via `session.connection().connection`.
+
+    Returns:
+        Number of rows copied
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        jsonb = _metadata_is_jsonb(cursor, table)
+        statement = f"COPY {table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT binary)"
+        copied = 0
+        for batch in _batches(rows, batch_size):
+            buffer = io.BytesIO()
+            buffer.write(_COPY_HEADER)
+            for row in batch:
+                buffer.write(encode_row(row, jsonb=jsonb))
+            buffer.write(_COPY_TRAILER)
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            copied += len(batch)
+        return copied
+    finally:
+        cursor.close()
+
+
+class BulkChunkWriter:
+    """
+    Load large numbers of chunks in a single transaction.
+
+    Args:
+        engine: SQLAlchemy engine to load through (defaults to the shared one)
+        batch_size: Rows per COPY statement - bounds client-side memory
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, batch_size: int = 5000):
+        self.engine = engine or default_engine
+        self.batch_size = batch_size
+
+    def write(self, rows: Iterable[ChunkRow], rebuild_index: bool = False,
+              index_method: Optional[str] = None) -> int:
+        """
+        Stream rows into document_chunks.
+
+        Args:
+            rows: Any iterable (a generator keeps memory flat)
+            rebuild_index: Drop idx_chunks_embedding before the load and build
+                it afterwards (parameters sized from the new row count) - much
+                faster than maintaining it row by row, and IVFFlat centroids
+                get trained on the loaded data. The index is rebuilt even when
+                the load fails and is rolled back; the load's error is the one raised
+            index_method: "hnsw" or "ivfflat" for the rebuilt index (default:
+                the dropped index's method, hnsw when there was none). Its
+                quantization and dimensions are kept from the dropped one
+
+        Returns:
+            Number of rows written
+        """
+        previous = None
+        if rebuild_index:
+            with self.engine.connect() as conn:
+                previous = current_index(conn)
+                conn.execute(text("DROP INDEX IF EXISTS idx_chunks_embedding"))
+                conn.commit()
+
+        try:
+            raw = self.engine.raw_connection()
+            try:
+                copied = copy_chunk_rows(raw, rows, batch_size=self.batch_size)
+                raw.commit()
+            except BaseException:
+                raw.rollback()
+                raise
+            finally:
+                raw.close()
+        except BaseException:
+            # Also after a failed COPY - otherwise every later search would be a sequential scan.
+            # (Dropping inside the COPY transaction instead would lock readers out for the whole load.)
+            if rebuild_index:
+                try:
+                    self._rebuild_index(previous, index_method)
+                except Exception as error:
+                    print(f"⚠️ Could not rebuild idx_chunks_embedding after the failed load: {error}")
+            raise
+        if rebuild_index:
+            self._rebuild_index(previous, index_method)
+        return copied
+
+    def _rebuild_index(self, previous: Optional[IndexConfig], method: Optional[str]) -> None:
+        build_index(engine=self.engine, method=method or (previous.method if previous else "hnsw"),
+                    concurrently=False,
+                    quantization=previous.quantization if previous else "none",
+                    dimensions=previous.dimensions if previous else None)
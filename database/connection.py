@@ -1,12 +1,32 @@
 """
 Database connection and session management using SQLAlchemy
 
-This module sets up the database engine and session factory.
+This module sets up the database engines and session factories.
+
+Key Concepts:
+- One pooled sync engine per process, shared by the ORM models, the bulk
+  writer and the vector store - no fresh TCP + auth handshake per request
+- A lazily created async engine (asyncpg) for FastAPI endpoints
+- Pool metrics (checked-out, overflow, time spent waiting for a connection)
+
+Configuration (environment):
+    POSTGRES_USER / POSTGRES_PASSWORD / POSTGRES_HOST / POSTGRES_PORT / POSTGRES_DB
+    DB_POOL_SIZE: Persistent connections per process (default 5)
+    DB_MAX_OVERFLOW: Extra connections allowed under burst load (default 10)
+    DB_POOL_TIMEOUT: Seconds to wait for a free connection (default 30)
+    DB_POOL_RECYCLE: Recycle connections older than this many seconds (default 1800)
+    DB_POOL_PRE_PING: Test connections before handing them out (default true)
+    DB_USE_NULLPOOL: Disable pooling, e.g. behind pgbouncer (default false)
+    DB_ECHO: Log every SQL statement (default false)
 """
+import os
+import threading
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import NullPool
-import os
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,14 +39,63 @@ POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "doc_analyser")
 
 DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+class _PoolWaitTimer:
+    """Mixin that records how long callers wait to check out a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
 
-# Create SQLAlchemy engine
-# poolclass=NullPool is useful for development to avoid connection pool issues
-engine = create_engine(
-    DATABASE_URL,
-    echo=True,  # Set to False in production
-    poolclass=NullPool
-)
+
+class TimedQueuePool(_PoolWaitTimer, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_PoolWaitTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_kwargs(pool_class) -> dict:
+    if _env_bool("DB_USE_NULLPOOL", False):
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": pool_class,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """Build a pooled sync engine from the DB_* environment settings"""
+    return create_engine(url, echo=_env_bool("DB_ECHO", False), **_pool_kwargs(TimedQueuePool))
+
+
+# Create SQLAlchemy engine - shared by everything in this process
+engine = create_db_engine()
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -34,6 +103,64 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for ORM models
 Base = declarative_base()
 
+_async_engine = None
+_async_session_factory = None
+_async_lock = threading.Lock()
+
+
+def get_async_engine():
+    """
+    Shared async engine (asyncpg), created on first use so sync-only
+    processes (CLI tools, workers) do not need asyncpg installed.
+    """
+    global _async_engine, _async_session_factory
+    with _async_lock:
+        if _async_engine is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            _async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                echo=_env_bool("DB_ECHO", False),
+                **_pool_kwargs(TimedAsyncAdaptedQueuePool)
+            )
+            _async_session_factory = async_sessionmaker(_async_engine, expire_on_commit=False)
+        return _async_engine
+
+
+def get_async_sessionmaker():
+    get_async_engine()
+    return _async_session_factory
+
+
+def pool_metrics(target=None) -> dict:
+    """
+    Connection pool metrics for an engine (defaults to the shared sync engine).
+
+    Returns:
+        Dict with pool size, checked-out and overflow connections, and
+        checkout wait statistics
+    """
+    target = target or engine
+    pool = getattr(target, "sync_engine", target).pool
+    if isinstance(pool, NullPool):
+        return {"pool": "null"}
+
+    metrics = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, _PoolWaitTimer):
+        metrics.update({
+            "checkouts": pool.checkouts,
+            "wait_seconds_total": pool.wait_seconds_total,
+            "wait_seconds_avg": pool.wait_seconds_total / pool.checkouts if pool.checkouts else 0.0,
+            "wait_seconds_max": pool.wait_seconds_max,
+        })
+    return metrics
+
 
 def get_db():
     """
@@ -49,3 +176,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Async dependency function to get a database session.
+
+    @app.get("/endpoint")
+    async def endpoint(db: AsyncSession = Depends(get_async_db)):
+        ...
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -0,0 +1,578 @@
+"""
+Vector index management for document_chunks
+
+Key Concepts:
+- IVFFlat clusters vectors into `lists` centroids at build time. It must be
+  built AFTER the data is loaded (centroids trained on an empty table are
+  useless) and `lists` should grow with the table: rows / 1000 up to 1M rows,
+  sqrt(rows) beyond that. At query time `ivfflat.probes` sets how many lists
+  are scanned - more probes, better recall, slower queries.
+- HNSW builds a graph (`m` links per node, `ef_construction` candidates while
+  building). It can be built on an empty table and needs no retraining, and
+  `hnsw.ef_search` is the query-time recall/latency knob.
+
+Search profiles ("fast", "balanced", "accurate") pick probes / ef_search for
+the index that actually exists, so callers never hard-code them.
+
+Quantized indexes keep the float32 `embedding` column as the source of truth
+and index a compact expression of it instead:
+- halfvec: embedding::halfvec - 2 bytes per dimension, half the index size
+- binary: binary_quantize(embedding)::bit - 1 bit per dimension, 32x smaller
+- dimensions=n: index only the first n dimensions (Matryoshka truncation -
+  text-embedding-3 models are trained so prefixes remain useful embeddings)
+The index finds `rerank_factor * k` candidates, which are then re-ranked by
+exact float32 cosine distance (see database.search). Switching modes needs
+no data migration: build_index builds the new expression index over the
+existing rows and swaps it in.
+
+Filtered searches (WHERE document_id = ... ORDER BY embedding <=> ...) would
+otherwise lose rows: the index returns ef_search / probes-worth of candidates
+and the filter drops most of them. pgvector >= 0.8 iterative index scans keep
+scanning until enough rows pass the filter; older versions fall back to an
+exact scan of the filtered rows.
+
+Usage:
+    python -m database.indexes status
+    python -m database.indexes build --method hnsw
+    python -m database.indexes build --method ivfflat          # lists derived from row count
+    python -m database.indexes build --quantization binary --dimensions 512
+    python -m database.indexes benchmark --queries 50 --k 10
+    python -m database.indexes benchmark-quantization --modes none halfvec halfvec:512 binary
+"""
+import argparse
+import math
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .connection import engine as default_engine
+
+INDEX_NAME = "idx_chunks_embedding"
+EMBEDDING_DIMENSIONS = 1536
+
+QUANTIZATIONS = ("none", "halfvec", "binary")
+
+# Candidates fetched per result before the exact re-rank
+RERANK_FACTORS = {"none": 1, "halfvec": 2, "binary": 10}
+
+# pgvector rejects hnsw.ef_search above this
+MAX_EF_SEARCH = 1000
+
+# Scale factors applied to the index's own parameters
+SEARCH_PROFILES = {
+    "fast": {"probes_per_sqrt_lists": 0.5, "ef_search": 40},
+    "balanced": {"probes_per_sqrt_lists": 1.0, "ef_search": 100},
+    "accurate": {"probes_per_sqrt_lists": 4.0, "ef_search": 400},
+}
+
+
+@dataclass
+class IndexConfig:
+    """
+    Attributes:
+        method: "hnsw" or "ivfflat"
+        lists: IVFFlat centroid count
+        m: HNSW links per node
+        ef_construction: HNSW build-time candidate list size
+        quantization: "none", "halfvec" or "binary" - what the index stores
+        dimensions: Index only the first n dimensions (None = all)
+    """
+    method: str = "hnsw"
+    lists: Optional[int] = None
+    m: int = 16
+    ef_construction: int = 64
+    quantization: str = "none"
+    dimensions: Optional[int] = None
+
+    def with_clause(self) -> str:
+        if self.method == "ivfflat":
+            return f"WITH (lists = {self.lists})"
+        return f"WITH (m = {self.m}, ef_construction = {self.ef_construction})"
+
+    def expression(self, vector: str) -> str:
+        """The indexed expression applied to `vector` (a column or a vector-typed SQL expression)"""
+        dimensions = self.dimensions or EMBEDDING_DIMENSIONS
+        if self.dimensions:
+            vector = f"subvector({vector}, 1, {dimensions})"
+        if self.quantization == "halfvec":
+            return f"({vector})::halfvec({dimensions})"
+        if self.quantization == "binary":
+            return f"binary_quantize({vector})::bit({dimensions})"
+        return vector if not self.dimensions else f"({vector})::vector({dimensions})"
+
+    def index_column(self) -> str:
+        """Column/expression plus operator class for CREATE INDEX"""
+        opclass = {"none": "vector_cosine_ops", "halfvec": "halfvec_cosine_ops", "binary": "bit_hamming_ops"}
+        if self.quantization == "none" and not self.dimensions:
+            return "embedding vector_cosine_ops"
+        return f"({self.expression('embedding')}) {opclass[self.quantization]}"
+
+    def order_by(self, column: str, query: str) -> str:
+        """ORDER BY expression that lets the planner use this index"""
+        operator = "<~>" if self.quantization == "binary" else "<=>"
+        return f"{self.expression(column)} {operator} {self.expression(query)}"
+
+    @property
+    def is_exact(self) -> bool:
+        """The index orders by the full float32 cosine distance (no re-rank needed)"""
+        return self.quantization == "none" and not self.dimensions
+
+    def candidates(self, k: int) -> int:
+        """
+        Rows to fetch from the index for k re-ranked results, at most MAX_EF_SEARCH.
+
+        Raises:
+            ValueError: If k is above MAX_EF_SEARCH - an HNSW scan yields at
+                most ef_search rows, so k results could not be returned
+        """
+        if k > MAX_EF_SEARCH:
+            raise ValueError(f"k={k} exceeds the {MAX_EF_SEARCH} rows an index scan can return")
+        factor = RERANK_FACTORS[self.quantization]
+        if self.dimensions:
+            factor *= 2  # truncation loses more ordering than quantization alone
+        return min(k * factor, MAX_EF_SEARCH)
+
+
+def recommend_index(row_count: int, method: str = "hnsw", quantization: str = "none",
+                    dimensions: Optional[int] = None) -> IndexConfig:
+    """Derive index parameters from the number of rows"""
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+    if dimensions is not None and not 0 < dimensions <= EMBEDDING_DIMENSIONS:
+        raise ValueError(f"dimensions must be between 1 and {EMBEDDING_DIMENSIONS}")
+    if method == "ivfflat":
+        if row_count <= 1_000_000:
+            lists = max(10, row_count // 1000)
+        else:
+            lists = int(math.sqrt(row_count))
+        return IndexConfig(method="ivfflat", lists=lists, quantization=quantization, dimensions=dimensions)
+    if method == "hnsw":
+        if row_count <= 1_000_000:
+            return IndexConfig(method="hnsw", m=16, ef_construction=64,
+                               quantization=quantization, dimensions=dimensions)
+        return IndexConfig(method="hnsw", m=24, ef_construction=128,
+                           quantization=quantization, dimensions=dimensions)
+    raise ValueError(f"Unknown index method: {method}")
+
+
+def count_rows(conn: Connection) -> int:
+    return conn.execute(text("SELECT count(*) FROM document_chunks WHERE embedding IS NOT NULL")).scalar()
+
+
+def current_index(conn: Connection, name: str = INDEX_NAME) -> Optional[IndexConfig]:
+    """Read the method and parameters of the existing vector index, if any"""
+    definition = conn.execute(
+        text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"), {"name": name}
+    ).scalar()
+    if definition is None:
+        return None
+
+    def option(name: str, default: Optional[int]) -> Optional[int]:
+        match = re.search(rf"{name}\s*=\s*'?(\d+)", definition)
+        return int(match.group(1)) if match else default
+
+    quantization, dimensions = "none", None
+    typed = re.search(r"::(halfvec|bit|vector)\((\d+)\)", definition)
+    if typed:
+        quantization = {"halfvec": "halfvec", "bit": "binary", "vector": "none"}[typed.group(1)]
+        dimensions = int(typed.group(2))
+        if dimensions == EMBEDDING_DIMENSIONS:
+            dimensions = None
+
+    if "USING ivfflat" in definition:
+        return IndexConfig(method="ivfflat", lists=option("lists", 100),
+                           quantization=quantization, dimensions=dimensions)
+    return IndexConfig(method="hnsw", m=option("m", 16), ef_construction=option("ef_construction", 64),
+                       quantization=quantization, dimensions=dimensions)
+
+
+def build_index(config: Optional[IndexConfig] = None, engine: Optional[Engine] = None,
+                method: str = "hnsw", concurrently: bool = True, quantization: str = "none",
+                dimensions: Optional[int] = None) -> IndexConfig:
+    """
+    (Re)build idx_chunks_embedding.
+
+    With concurrently=True the new index is built next to the old one with
+    CREATE INDEX CONCURRENTLY and swapped in by rename, so searches keep
+    working during the rebuild.
+
+    Args:
+        config: Explicit parameters; derived from the row count when None
+        engine: Engine to use (defaults to the shared one)
+        method: "hnsw" or "ivfflat", used when config is None
+        concurrently: Build without blocking writes
+        quantization: "none", "halfvec" or "binary", used when config is None
+        dimensions: Indexed dimensions (None = all), used when config is None
+
+    Returns:
+        The IndexConfig that was built
+    """
+    engine = engine or default_engine
+    with engine.connect() as conn:
+        if config is None:
+            config = recommend_index(count_rows(conn), method, quantization, dimensions)
+        conn.execute(text("ANALYZE document_chunks"))
+        conn.commit()
+
+    temp_name = f"{INDEX_NAME}_new"
+    create = (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{temp_name} ON document_chunks "
+        f"USING {config.method} ({config.index_column()}) {config.with_clause()}"
+    )
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {temp_name}"))
+        conn.execute(text(create))
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {INDEX_NAME}"))
+        conn.execute(text(f"ALTER INDEX {temp_name} RENAME TO {INDEX_NAME}"))
+
+    forget_index_cache()
+    return config
+
+
+_index_cache: Dict[int, Optional[IndexConfig]] = {}
+_iterative_scan_cache: Dict[int, bool] = {}
+
+
+def search_index(conn: Connection) -> Optional[IndexConfig]:
+    """current_index, looked up once per engine - the definition rarely changes"""
+    key = id(conn.engine)
+    if key not in _index_cache:
+        _index_cache[key] = current_index(conn)
+    return _index_cache[key]
+
+
+def supports_iterative_scan(conn: Connection) -> bool:
+    """Whether the installed pgvector (>= 0.8) has iterative index scans"""
+    key = id(conn.engine)
+    if key not in _iterative_scan_cache:
+        version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+        major, minor = (int(part) for part in (version or "0.0").split(".")[:2])
+        _iterative_scan_cache[key] = (major, minor) >= (0, 8)
+    return _iterative_scan_cache[key]
+
+
+def search_settings(conn: Connection, profile: str = "balanced", k: int = 4,
+                    filtered: bool = False) -> Dict[str, object]:
+    """
+    Query-time parameters for the current index and a search profile.
+
+    Args:
+        conn: Connection the search runs on
+        profile: Search profile name
+        k: Number of results wanted
+        filtered: The query has a WHERE clause - scan the index iteratively
+            until k rows pass it
+
+    Returns:
+        Mapping of setting name (ivfflat.probes / hnsw.ef_search / ...) to value
+    """
+    if profile not in SEARCH_PROFILES:
+        raise ValueError(f"Unknown search profile: {profile}")
+    settings = SEARCH_PROFILES[profile]
+    index = search_index(conn)
+
+    if index is None:
+        return {}
+    if filtered and not supports_iterative_scan(conn):
+        # No iterative scans: an exact scan of the filtered rows is the only
+        # way to guarantee k results
+        return {"enable_indexscan": "off"}
+    if index.method == "ivfflat":
+        probes = round(math.sqrt(index.lists) * settings["probes_per_sqrt_lists"])
+        result = {"ivfflat.probes": min(max(1, probes), index.lists)}
+        if filtered:
+            # ivfflat only supports relaxed order - callers re-sort by distance
+            result["ivfflat.iterative_scan"] = "relaxed_order"
+        return result
+    # ef_search below k would cap the number of results
+    result = {"hnsw.ef_search": min(max(settings["ef_search"], k), MAX_EF_SEARCH)}
+    if filtered:
+        result["hnsw.iterative_scan"] = "strict_order"
+    return result
+
+
+def apply_search_settings(conn: Connection, profile: str = "balanced", k: int = 4,
+                          filtered: bool = False) -> None:
+    """SET LOCAL the profile's parameters - they last until the transaction ends"""
+    for name, value in search_settings(conn, profile, k, filtered).items():
+        # Values are ints or fixed keywords from search_settings, never user input
+        value = value if isinstance(value, str) else int(value)
+        conn.execute(text(f"SET LOCAL {name} = {value}"))
+
+
+def knn_sql(index: Optional[IndexConfig], query: str, condition: str = "TRUE",
+            k_param: str = ":k", candidates_param: str = ":candidates") -> str:
+    """
+    SELECT (id, distance) of the nearest chunks to `query`.
+
+    The inner query orders by the index's own expression (so the planner can
+    use a quantized / truncated index) and fetches `candidates_param` rows; the
+    outer query re-ranks them by exact float32 cosine distance and keeps
+    `k_param`. It also restores strict order after relaxed iterative scans.
+
+    Args:
+        index: Index being searched (None or exact = plain cosine ordering)
+        query: SQL expression of the query vector, e.g. CAST(:embedding AS vector)
+        condition: Extra WHERE condition on document_chunks c
+        k_param: Bind parameter (or literal) for the number of results
+        candidates_param: Bind parameter (or literal) for rows taken from the index
+    """
+    exact = f"c.embedding <=> {query}"
+    order = exact if index is None or index.is_exact else index.order_by("c.embedding", query)
+    return f"""
+        SELECT id, distance FROM (
+            SELECT c.id, {exact} AS distance
+            FROM document_chunks c
+            WHERE c.embedding IS NOT NULL AND {condition}
+            ORDER BY {order}
+            LIMIT {candidates_param}
+        ) candidates
+        ORDER BY distance
+        LIMIT {k_param}
+    """
+
+
+def forget_index_cache() -> None:
+    """Call after rebuilding the index from another process"""
+    _index_cache.clear()
+    _iterative_scan_cache.clear()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def benchmark(queries: int = 50, k: int = 10, profiles: Optional[List[str]] = None,
+              engine: Optional[Engine] = None) -> List[dict]:
+    """
+    Recall@k and latency of each search profile against exact search.
+
+    Stored embeddings are sampled as queries. Ground truth comes from the same
+    query with index scans disabled (a sequential, exact scan).
+
+    Returns:
+        One dict per profile with recall, p50/p95 latency in ms and settings
+    """
+    engine = engine or default_engine
+    profiles = profiles or list(SEARCH_PROFILES)
+    knn = text(
+        "SELECT id FROM document_chunks WHERE embedding IS NOT NULL "
+        "ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"
+    )
+
+    with engine.connect() as conn:
+        samples = [
+            row[0] for row in conn.execute(text(
+                "SELECT embedding::text FROM document_chunks WHERE embedding IS NOT NULL "
+                "ORDER BY random() LIMIT :n"
+            ), {"n": queries})
+        ]
+        conn.commit()
+        truth = []
+        for query in samples:
+            with conn.begin():
+                conn.execute(text("SET LOCAL enable_indexscan = off"))
+                truth.append({row[0] for row in conn.execute(knn, {"query": query, "k": k})})
+
+        forget_index_cache()
+        index = search_index(conn)
+        conn.commit()
+        candidates = index.candidates(k) if index is not None else k
+        # Same two-stage query as database.search, so quantized indexes are used
+        search = text(knn_sql(index, "CAST(:query AS vector)"))
+        results = []
+        for profile in profiles:
+            recalls, latencies = [], []
+            settings = {}
+            for query, expected in zip(samples, truth):
+                with conn.begin():
+                    settings = search_settings(conn, profile, candidates)
+                    apply_search_settings(conn, profile, candidates)
+                    started = time.perf_counter()
+                    found = {row[0] for row in conn.execute(search, {
+                        "query": query, "k": k, "candidates": candidates
+                    })}
+                    latencies.append((time.perf_counter() - started) * 1000)
+                recalls.append(len(found & expected) / max(len(expected), 1))
+            results.append({
+                "profile": profile,
+                "settings": settings,
+                "recall": statistics.mean(recalls) if recalls else 0.0,
+                "p50_ms": _percentile(latencies, 50) if latencies else 0.0,
+                "p95_ms": _percentile(latencies, 95) if latencies else 0.0,
+            })
+    return results
+
+
+def index_size(conn: Connection, name: str = INDEX_NAME) -> int:
+    """On-disk size of an index in bytes"""
+    return conn.execute(text("SELECT pg_relation_size(CAST(:name AS regclass))"), {"name": name}).scalar()
+
+
+def parse_mode(mode: str) -> IndexConfig:
+    """"halfvec", "binary:512", "none:256" -> quantization and truncation of an IndexConfig"""
+    quantization, _, dimensions = mode.partition(":")
+    return IndexConfig(quantization=quantization, dimensions=int(dimensions) if dimensions else None)
+
+
+def benchmark_quantization(modes: Optional[List[str]] = None, queries: int = 50, k: int = 10,
+                           method: str = "hnsw", engine: Optional[Engine] = None) -> List[dict]:
+    """
+    Index size, latency and recall@k of each storage mode.
+
+    Each mode's index is built next to the live one (as idx_chunks_embedding_bench,
+    blocking writes while it builds), measured with the same two-stage
+    search database.search runs (index candidates + exact re-rank), then
+    dropped. Ground truth is an exact scan.
+
+    Args:
+        modes: Modes as accepted by parse_mode (default: none, halfvec, halfvec:512, binary)
+        queries: Stored embeddings sampled as queries
+        k: Results per query
+        method: "hnsw" or "ivfflat"
+
+    Returns:
+        One dict per mode with index size in MB, recall, p50/p95 latency in ms
+    """
+    engine = engine or default_engine
+    modes = modes or ["none", "halfvec", "halfvec:512", "binary"]
+    bench_name = f"{INDEX_NAME}_bench"
+    query = "CAST(:query AS vector)"
+
+    with engine.connect() as conn:
+        rows = count_rows(conn)
+        samples = [
+            row[0] for row in conn.execute(text(
+                "SELECT embedding::text FROM document_chunks WHERE embedding IS NOT NULL "
+                "ORDER BY random() LIMIT :n"
+            ), {"n": queries})
+        ]
+        conn.commit()
+        truth = []
+        for sample in samples:
+            with conn.begin():
+                conn.execute(text("SET LOCAL enable_indexscan = off"))
+                truth.append({row.id for row in conn.execute(text(knn_sql(None, query)),
+                                                             {"query": sample, "k": k, "candidates": k})})
+
+    results = []
+    for mode in modes:
+        shape = parse_mode(mode)
+        config = recommend_index(rows, method, shape.quantization, shape.dimensions)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"DROP INDEX IF EXISTS {bench_name}"))
+            conn.execute(text(
+                f"CREATE INDEX {bench_name} ON document_chunks "
+                f"USING {config.method} ({config.index_column()}) {config.with_clause()}"
+            ))
+        try:
+            with engine.connect() as conn:
+                size = index_size(conn, bench_name)
+                conn.commit()
+                candidates = config.candidates(k)
+                statement = text(knn_sql(config, query))
+                recalls, latencies = [], []
+                for sample, expected in zip(samples, truth):
+                    with conn.begin():
+                        if config.method == "ivfflat":
+                            conn.execute(text(f"SET LOCAL ivfflat.probes = {max(1, round(math.sqrt(config.lists)))}"))
+                        else:
+                            conn.execute(text(f"SET LOCAL hnsw.ef_search = {min(max(100, candidates), MAX_EF_SEARCH)}"))
+                        started = time.perf_counter()
+                        found = {row.id for row in conn.execute(statement, {
+                            "query": sample, "k": k, "candidates": candidates
+                        })}
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    recalls.append(len(found & expected) / max(len(expected), 1))
+        finally:
+            with engine.connect() as conn:
+                conn.execute(text(f"DROP INDEX IF EXISTS {bench_name}"))
+                conn.commit()
+
+        results.append({
+            "mode": mode,
+            "index_mb": size / 1024 / 1024,
+            "recall": statistics.mean(recalls) if recalls else 0.0,
+            "p50_ms": _percentile(latencies, 50) if latencies else 0.0,
+            "p95_ms": _percentile(latencies, 95) if latencies else 0.0,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the document_chunks vector index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="Show the current index and recommended parameters")
+
+    build = commands.add_parser("build", help="(Re)build the index")
+    build.add_argument("--method", choices=["hnsw", "ivfflat"], default="hnsw")
+    build.add_argument("--lists", type=int, help="IVFFlat lists (default: derived from row count)")
+    build.add_argument("--m", type=int, help="HNSW m")
+    build.add_argument("--ef-construction", type=int, help="HNSW ef_construction")
+    build.add_argument("--blocking", action="store_true", help="Plain CREATE INDEX instead of CONCURRENTLY")
+    build.add_argument("--quantization", choices=QUANTIZATIONS, default="none",
+                       help="Store halfvec or binary codes in the index (re-ranked exactly at query time)")
+    build.add_argument("--dimensions", type=int, help="Index only the first N dimensions (Matryoshka truncation)")
+
+    bench = commands.add_parser("benchmark", help="Recall vs latency for each search profile")
+    bench.add_argument("--queries", type=int, default=50)
+    bench.add_argument("--k", type=int, default=10)
+
+    quantized = commands.add_parser("benchmark-quantization", help="Index size, recall and latency per storage mode")
+    quantized.add_argument("--modes", nargs="+", help="e.g. none halfvec halfvec:512 binary binary:768")
+    quantized.add_argument("--method", choices=["hnsw", "ivfflat"], default="hnsw")
+    quantized.add_argument("--queries", type=int, default=50)
+    quantized.add_argument("--k", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        with default_engine.connect() as conn:
+            rows = count_rows(conn)
+            print(f"Rows with embeddings: {rows}")
+            index = current_index(conn)
+            print(f"Current index: {index}")
+            if index is not None:
+                print(f"Index size: {index_size(conn) / 1024 / 1024:.1f} MB")
+            for method in ("hnsw", "ivfflat"):
+                print(f"Recommended {method}: {recommend_index(rows, method)}")
+
+    elif args.command == "build":
+        with default_engine.connect() as conn:
+            config = recommend_index(count_rows(conn), args.method, args.quantization, args.dimensions)
+        if args.lists:
+            config.lists = args.lists
+        if args.m:
+            config.m = args.m
+        if args.ef_construction:
+            config.ef_construction = args.ef_construction
+        print(f"🔍 Building {config}...")
+        build_index(config, concurrently=not args.blocking)
+        print("✅ Index built")
+
+    elif args.command == "benchmark":
+        print(f"{'profile':<10} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}  settings")
+        for result in benchmark(queries=args.queries, k=args.k):
+            print(f"{result['profile']:<10} {result['recall']:>8.3f} {result['p50_ms']:>8.2f} "
+                  f"{result['p95_ms']:>8.2f}  {result['settings']}")
+
+    elif args.command == "benchmark-quantization":
+        print(f"{'mode':<14} {'index MB':>9} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        for result in benchmark_quantization(args.modes, queries=args.queries, k=args.k, method=args.method):
+            print(f"{result['mode']:<14} {result['index_mb']:>9.1f} {result['recall']:>8.3f} "
+                  f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
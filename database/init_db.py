@@ -4,14 +4,49 @@ Database initialization script
 Run this script to:
 1. Enable pgvector extension
 2. Create all tables defined in models.py
-3. Create necessary indexes
+3. Add columns introduced after the first release
+
+The vector index is managed by database.indexes once data is loaded.
 
 Usage:
     python -m database.init_db
 """
 from sqlalchemy import text
 from .connection import engine, Base
-from .models import Document, DocumentChunk
+from .models import Document, DocumentChunk, TEXT_SEARCH_CONFIG
+
+# Columns added after the first release - create_all() does not alter
+# existing tables, so add them here for databases created earlier
+COLUMN_MIGRATIONS = [
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS source_path VARCHAR(1024)",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'pending'",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS error TEXT",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_count INTEGER",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}', chunk_text)) STORED",
+    "CREATE INDEX IF NOT EXISTS idx_chunks_search_vector ON document_chunks USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_source_path ON documents (source_path)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_status ON documents (status)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_file_type ON documents (file_type)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_upload_date ON documents (upload_date)",
+    # metadata columns were created as json - jsonb supports @> and GIN indexes
+    *[
+        f"""
+        DO $$
+        BEGIN
+            IF (SELECT data_type FROM information_schema.columns
+                WHERE table_name = '{table}' AND column_name = 'metadata') = 'json' THEN
+                ALTER TABLE {table} ALTER COLUMN metadata TYPE jsonb USING metadata::jsonb;
+            END IF;
+        END $$
+        """
+        for table in ("documents", "document_chunks")
+    ],
+    "CREATE INDEX IF NOT EXISTS idx_documents_metadata ON documents USING gin (metadata jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_chunks_metadata ON document_chunks USING gin (metadata jsonb_path_ops)",
+]
 
 
 def init_database():
@@ -29,18 +64,17 @@ def init_database():
     print("📋 Creating tables...")
     Base.metadata.create_all(bind=engine)
 
-    # Create vector index for similarity search
     with engine.connect() as conn:
-        print("🔍 Creating vector similarity index...")
-        # IVFFlat index for fast approximate nearest neighbor search
-        conn.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_chunks_embedding
-            ON document_chunks
-            USING ivfflat (embedding vector_cosine_ops)
-            WITH (lists = 100)
-        """))
+        print("🧱 Applying column migrations...")
+        for statement in COLUMN_MIGRATIONS:
+            conn.execute(text(statement))
         conn.commit()
 
+    # The vector index is built separately, once there is data to size it from
+    # (IVFFlat centroids trained on an empty table give poor recall):
+    #     python -m database.indexes build --method hnsw
+    print("ℹ️  Build the vector index after loading data: python -m database.indexes build")
+
     print("✅ Database initialized successfully!")
 
 
@@ -8,12 +8,16 @@ Key Concepts:
 - DocumentChunk: Stores text chunks with vector embeddings for semantic search
 - pgvector: PostgreSQL extension for efficient vector similarity search
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Computed, Index, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
 from .connection import Base
 
+# Text search configuration used for the generated tsvector and for queries
+TEXT_SEARCH_CONFIG = "english"
+
 
 class Document(Base):
     """
@@ -25,17 +29,35 @@ class Document(Base):
         file_type: File extension (pdf, docx, txt)
         upload_date: Timestamp of upload
         summary: AI-generated summary of the document
-        metadata: Additional JSON metadata (file size, page count, etc.)
+        doc_metadata: Additional JSONB metadata (file size, page count, tenant, etc.),
+            stored in the "metadata" column (the attribute name is reserved by SQLAlchemy)
+        source_path: Path the file was ingested from
+        status: Ingestion status (pending, completed, failed)
+        error: Last ingestion error, if any
+        chunk_count: Number of chunks stored for this document
+        content_hash: SHA-256 of the file, used to skip unchanged files on re-ingest
         chunks: Relationship to DocumentChunk (one-to-many)
     """
     __tablename__ = "documents"
+    __table_args__ = (
+        # jsonb_path_ops GIN index serves metadata containment (@>) filters
+        Index("idx_documents_metadata", "metadata", postgresql_using="gin",
+              postgresql_ops={"metadata": "jsonb_path_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
-    file_type = Column(String(50))
-    upload_date = Column(DateTime(timezone=True), server_default=func.now())
+    file_type = Column(String(50), index=True)
+    upload_date = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     summary = Column(Text, nullable=True)
-    metadata = Column(JSON, default={})
+    doc_metadata = Column("metadata", JSONB, default={})
+
+    # Ingestion bookkeeping - lets interrupted bulk ingests resume
+    source_path = Column(String(1024), nullable=True, index=True)
+    status = Column(String(20), default="pending", index=True)
+    error = Column(Text, nullable=True)
+    chunk_count = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True)
 
     # Relationship to chunks - allows document.chunks to access all chunks
     chunks = relationship(
@@ -61,7 +83,10 @@ class DocumentChunk(Base):
         chunk_text: The actual text content of this chunk
         chunk_index: Order of this chunk in the document (0, 1, 2, ...)
         embedding: Vector embedding (1536 dimensions for OpenAI embeddings)
-        metadata: Additional JSON metadata (page number, section, etc.)
+        chunk_metadata: Additional JSONB metadata (page number, section, etc.),
+            stored in the "metadata" column
+        content_hash: SHA-256 of chunk_text, used to diff chunks on re-ingest
+        search_vector: Full-text search vector generated by Postgres from chunk_text
         created_at: Timestamp of creation
         document: Relationship back to Document
 
@@ -76,6 +101,12 @@ class DocumentChunk(Base):
     - Enable similarity search (find similar content)
     """
     __tablename__ = "document_chunks"
+    __table_args__ = (
+        # GIN index for full-text (lexical) search on search_vector
+        Index("idx_chunks_search_vector", "search_vector", postgresql_using="gin"),
+        Index("idx_chunks_metadata", "metadata", postgresql_using="gin",
+              postgresql_ops={"metadata": "jsonb_path_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(
@@ -91,9 +122,17 @@ class DocumentChunk(Base):
     # 1536 is the dimension for OpenAI's text-embedding-3-small model
     embedding = Column(Vector(1536))
 
-    metadata = Column(JSON, default={})
+    chunk_metadata = Column("metadata", JSONB, default={})
+    content_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Generated column - Postgres keeps it in sync with chunk_text, so inserts
+    # (ORM or COPY) never set it
+    search_vector = Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}', chunk_text)", persisted=True)
+    )
+
     # Relationship back to document
     document = relationship("Document", back_populates="chunks")
 
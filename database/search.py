@@ -0,0 +1,274 @@
+"""
+Search over document_chunks
+
+- Vector k-NN: runs the ANN query and the SET LOCAL of the search profile's
+  parameters (ivfflat.probes / hnsw.ef_search) in the same transaction, so
+  every query uses the recall/latency trade-off of the index actually built.
+  Quantized / truncated indexes return extra candidates that are re-ranked
+  by exact float32 distance (database.indexes.knn_sql)
+- Lexical: Postgres full-text search on the generated search_vector column
+  (GIN index) - finds exact identifiers like part numbers and error codes
+- Hybrid: both rankings in one SQL round-trip, fused with reciprocal rank
+  fusion (RRF)
+
+Every search takes an optional SearchFilter (langchain_components.filters)
+that is applied inside the query, before the top-k, so filtered searches
+return k rows instead of whatever survives post-filtering.
+"""
+import json
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .indexes import apply_search_settings, knn_sql, search_index
+from .models import DocumentChunk, TEXT_SEARCH_CONFIG
+
+
+def _load_ranked(db: Session, ranked, column: str = "score") -> List[Tuple[DocumentChunk, float]]:
+    chunks = {
+        chunk.id: chunk
+        for chunk in db.query(DocumentChunk).filter(DocumentChunk.id.in_([row.id for row in ranked]))
+    }
+    return [(chunks[row.id], float(getattr(row, column))) for row in ranked]
+
+
+def _has_filter(filters) -> bool:
+    return filters is not None and not filters.is_empty()
+
+
+def chunk_filter_sql(filters, alias: str = "c") -> Tuple[str, dict]:
+    """
+    SQL condition on document_chunks for a SearchFilter.
+
+    Document ids hit the document_id index, file type and upload date the
+    documents indexes, metadata containment the GIN index on metadata.
+
+    Returns:
+        (condition, bind parameters); condition is "TRUE" without a filter
+    """
+    if not _has_filter(filters):
+        return "TRUE", {}
+    conditions, params = [], {}
+    if filters.document_ids:
+        conditions.append(f"{alias}.document_id = ANY(:filter_document_ids)")
+        params["filter_document_ids"] = list(filters.document_ids)
+
+    document_conditions = []
+    if filters.file_types:
+        document_conditions.append("d.file_type = ANY(:filter_file_types)")
+        params["filter_file_types"] = list(filters.file_types)
+    if filters.uploaded_after:
+        document_conditions.append("d.upload_date >= :filter_uploaded_after")
+        params["filter_uploaded_after"] = filters.uploaded_after
+    if filters.uploaded_before:
+        document_conditions.append("d.upload_date <= :filter_uploaded_before")
+        params["filter_uploaded_before"] = filters.uploaded_before
+    if document_conditions:
+        conditions.append(
+            f"{alias}.document_id IN (SELECT d.id FROM documents d WHERE {' AND '.join(document_conditions)})"
+        )
+
+    if filters.metadata:
+        conditions.append(f"{alias}.metadata @> CAST(:filter_metadata AS jsonb)")
+        params["filter_metadata"] = json.dumps(filters.metadata)
+    return " AND ".join(conditions), params
+
+
+def collection_filter_sql(filters, alias: str = "e") -> Tuple[str, dict]:
+    """
+    SQL condition on langchain_pg_embedding.cmetadata for a SearchFilter.
+
+    Equality conditions are merged into one @> containment so the
+    jsonb_path_ops GIN index on cmetadata can answer them. Several document
+    ids or file types are matched with a containment per value (any of them),
+    which the index serves too, and ids compare as JSON numbers either way;
+    dates are compared as timestamptz, not as text.
+
+    Returns:
+        (condition, bind parameters); condition is "TRUE" without a filter
+    """
+    if not _has_filter(filters):
+        return "TRUE", {}
+    conditions, params = [], {}
+    contains = filters.contains()
+    if contains:
+        conditions.append(f"{alias}.cmetadata @> CAST(:filter_contains AS jsonb)")
+        params["filter_contains"] = json.dumps(contains)
+    if filters.document_ids and len(filters.document_ids) > 1:
+        conditions.append(f"{alias}.cmetadata @> ANY(CAST(:filter_document_ids AS jsonb[]))")
+        params["filter_document_ids"] = [
+            json.dumps({"document_id": int(document_id)}) for document_id in filters.document_ids
+        ]
+    if filters.file_types and len(filters.file_types) > 1:
+        conditions.append(f"{alias}.cmetadata @> ANY(CAST(:filter_file_types AS jsonb[]))")
+        params["filter_file_types"] = [json.dumps({"file_type": file_type}) for file_type in filters.file_types]
+    # SearchFilter normalizes the bounds to aware UTC datetimes
+    if filters.uploaded_after:
+        conditions.append(f"CAST({alias}.cmetadata ->> 'uploaded_at' AS timestamptz) >= :filter_uploaded_after")
+        params["filter_uploaded_after"] = filters.uploaded_after
+    if filters.uploaded_before:
+        conditions.append(f"CAST({alias}.cmetadata ->> 'uploaded_at' AS timestamptz) <= :filter_uploaded_before")
+        params["filter_uploaded_before"] = filters.uploaded_before
+    return " AND ".join(conditions), params
+
+
+def search_chunks(db: Session, query_embedding: List[float], k: int = 4,
+                  profile: str = "balanced", filters=None) -> List[Tuple[DocumentChunk, float]]:
+    """
+    Nearest chunks to a query embedding by cosine distance.
+
+    With a filter the index is scanned iteratively (pgvector >= 0.8) until k
+    rows pass it, instead of filtering an already truncated candidate list.
+
+    Args:
+        db: Open session
+        query_embedding: Embedded query
+        k: Number of chunks to return
+        profile: Search profile from database.indexes.SEARCH_PROFILES
+        filters: Optional SearchFilter
+
+    Returns:
+        List of (chunk, cosine distance), closest first
+    """
+    condition, params = chunk_filter_sql(filters)
+    index = search_index(db.connection())
+    candidates = index.candidates(k) if index is not None else k
+    apply_search_settings(db.connection(), profile, candidates, filtered=_has_filter(filters))
+    rows = db.execute(text(knn_sql(index, "CAST(:embedding AS vector)", condition)), {
+        "embedding": vector_literal(query_embedding),
+        "k": k,
+        "candidates": candidates,
+        **params,
+    }).all()
+    return _load_ranked(db, rows, "distance")
+
+
+def vector_literal(embedding: List[float]) -> str:
+    """pgvector text input format: [x1,x2,...]"""
+    return "[" + ",".join(repr(float(value)) for value in embedding) + "]"
+
+
+def search_chunks_batch(db: Session, query_embeddings: List[List[float]], k: int = 4,
+                        profile: str = "balanced", filters=None) -> List[List[Tuple[DocumentChunk, float]]]:
+    """
+    k-NN for many query embeddings in a single SQL statement.
+
+    Each query vector drives its own index-backed top-k through a LATERAL
+    join, so N questions cost one round-trip instead of N.
+
+    Returns:
+        Per query (in input order), a list of (chunk, cosine distance)
+    """
+    if not query_embeddings:
+        return []
+    condition, params = chunk_filter_sql(filters)
+    index = search_index(db.connection())
+    candidates = index.candidates(k) if index is not None else k
+    apply_search_settings(db.connection(), profile, candidates, filtered=_has_filter(filters))
+    rows = db.execute(text("""
+        WITH queries AS (
+            SELECT ord, CAST(vec AS vector) AS embedding
+            FROM unnest(CAST(:vectors AS text[])) WITH ORDINALITY AS q(vec, ord)
+        )
+        SELECT queries.ord, hit.id, hit.distance
+        FROM queries
+        CROSS JOIN LATERAL (""" + knn_sql(index, "queries.embedding", condition) + """) hit
+        ORDER BY queries.ord, hit.distance
+    """), {
+        "vectors": [vector_literal(e) for e in query_embeddings],
+        "k": k,
+        "candidates": candidates,
+        **params,
+    }).all()
+
+    chunks = {
+        chunk.id: chunk
+        for chunk in db.query(DocumentChunk).filter(DocumentChunk.id.in_({row.id for row in rows}))
+    }
+    results: List[List[Tuple[DocumentChunk, float]]] = [[] for _ in query_embeddings]
+    for row in rows:
+        results[row.ord - 1].append((chunks[row.id], float(row.distance)))
+    return results
+
+
+# ts_rank_cd normalization 1 divides by 1 + log(document length) - a cheap
+# stand-in for BM25's length normalization
+_LEXICAL_CTE = """
+    lexical AS (
+        SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+        FROM (
+            SELECT c.id, ts_rank_cd(c.search_vector, query, 1) AS score
+            FROM document_chunks c, websearch_to_tsquery('{config}', :query) query
+            WHERE c.search_vector @@ query AND {filter}
+            ORDER BY score DESC
+            LIMIT :candidates
+        ) ranked
+    )
+""".replace("{config}", TEXT_SEARCH_CONFIG)
+
+_SEMANTIC_CTE = """
+    semantic AS (
+        SELECT id, row_number() OVER (ORDER BY distance) AS rank
+        FROM ({nearest}) nearest
+    )
+"""
+
+
+def hybrid_search_chunks(db: Session, query: str, query_embedding: Optional[List[float]] = None,
+                         k: int = 4, candidates: int = 50, rrf_k: int = 60,
+                         profile: str = "balanced", filters=None) -> List[Tuple[DocumentChunk, float]]:
+    """
+    Lexical + vector search fused with reciprocal rank fusion, in one statement.
+
+    Each side ranks its top `candidates`; a chunk scores
+    1 / (rrf_k + lexical rank) + 1 / (rrf_k + vector rank), missing ranks
+    contributing 0. Without a query embedding only the lexical side runs -
+    no embedding round-trip at all.
+
+    Args:
+        db: Open session
+        query: Raw user query (websearch syntax: quotes, OR, -term)
+        query_embedding: Embedded query, or None for lexical-only search
+        k: Number of chunks to return
+        candidates: Candidates taken from each ranking before fusion
+        rrf_k: RRF damping constant
+        profile: Search profile for the vector side
+        filters: Optional SearchFilter, applied to both sides
+
+    Returns:
+        List of (chunk, fused score), best first
+    """
+    condition, params = chunk_filter_sql(filters)
+    lexical = _LEXICAL_CTE.replace("{filter}", condition)
+    if query_embedding is None:
+        ranked = db.execute(text(
+            "WITH" + lexical +
+            "SELECT id, 1.0 / (:rrf_k + rank) AS score FROM lexical ORDER BY rank LIMIT :k"
+        ), {"query": query, "candidates": candidates, "rrf_k": rrf_k, "k": k, **params}).all()
+        return _load_ranked(db, ranked)
+
+    index = search_index(db.connection())
+    semantic_candidates = index.candidates(candidates) if index is not None else candidates
+    apply_search_settings(db.connection(), profile, semantic_candidates, filtered=_has_filter(filters))
+    nearest = knn_sql(index, "CAST(:embedding AS vector)", condition,
+                      k_param=":candidates", candidates_param=":semantic_candidates")
+    ranked = db.execute(text(
+        "WITH" + lexical + "," + _SEMANTIC_CTE.replace("{nearest}", nearest) + """
+        SELECT coalesce(l.id, s.id) AS id,
+               coalesce(1.0 / (:rrf_k + l.rank), 0) + coalesce(1.0 / (:rrf_k + s.rank), 0) AS score
+        FROM lexical l
+        FULL OUTER JOIN semantic s ON s.id = l.id
+        ORDER BY score DESC
+        LIMIT :k
+        """
+    ), {
+        "query": query,
+        "embedding": vector_literal(query_embedding),
+        "candidates": candidates,
+        "semantic_candidates": semantic_candidates,
+        "rrf_k": rrf_k,
+        "k": k,
+        **params,
+    }).all()
+    return _load_ranked(db, ranked)
@@ -0,0 +1,133 @@
+"""
+Semantic answer cache for RAGChain
+
+Users ask the same questions in many phrasings. Instead of retrieving and
+generating again, a new question is compared (cosine similarity of its
+embedding) with previously answered questions; above the threshold the stored
+answer is returned without touching the vector store or the LLM.
+
+Entries are scoped to (collection, content version): when documents in the
+collection change, the version changes and older answers stop matching.
+Entries also expire after a TTL and the least recently used ones are evicted
+once the cache is full.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+Scope = Tuple[str, str]
+
+
+@dataclass
+class _Entry:
+    scope: Scope
+    question: str
+    vector: np.ndarray
+    answer: str
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Args:
+        threshold: Minimum cosine similarity for a hit
+        ttl_seconds: How long an answer stays valid
+        max_entries: LRU capacity across all collections
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600.0, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()  # LRU order
+        self._scopes: Dict[Scope, List[int]] = {}
+        self._matrices: Dict[Scope, Tuple[List[int], np.ndarray]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._scopes[entry.scope].remove(entry_id)
+        if not self._scopes[entry.scope]:
+            del self._scopes[entry.scope]
+        self._matrices.pop(entry.scope, None)
+
+    def _scope_matrix(self, scope: Scope) -> Tuple[List[int], Optional[np.ndarray]]:
+        now = time.monotonic()
+        for entry_id in list(self._scopes.get(scope, [])):
+            if now - self._entries[entry_id].created_at > self.ttl_seconds:
+                self._remove(entry_id)
+
+        if scope not in self._matrices:
+            ids = list(self._scopes.get(scope, []))
+            if not ids:
+                return [], None
+            self._matrices[scope] = (ids, np.stack([self._entries[i].vector for i in ids]))
+        return self._matrices[scope]
+
+    def lookup(self, collection: str, version: str, embedding: List[float]) -> Optional[str]:
+        """
+        Return a cached answer for a similar enough question, or None.
+
+        Args:
+            collection: Collection the question was asked against
+            version: Current content version of that collection
+            embedding: Embedding of the new question
+        """
+        query = self._unit(embedding)
+        with self._lock:
+            ids, matrix = self._scope_matrix((collection, version))
+            if matrix is not None:
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id = ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id].answer
+            self.misses += 1
+            return None
+
+    def store(self, collection: str, version: str, question: str, embedding: List[float], answer: str) -> None:
+        with self._lock:
+            scope = (collection, version)
+            # Answers for an older version of this collection can never match again
+            for stale in [s for s in self._scopes if s[0] == collection and s != scope]:
+                for old_id in list(self._scopes[stale]):
+                    self._remove(old_id)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(scope, question, self._unit(embedding), answer, time.monotonic())
+            self._scopes.setdefault(scope, []).append(entry_id)
+            self._matrices.pop(scope, None)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, collection: Optional[str] = None) -> None:
+        """Drop every entry for a collection (or everything when None)"""
+        with self._lock:
+            for entry_id, entry in list(self._entries.items()):
+                if collection is None or entry.scope[0] == collection:
+                    self._remove(entry_id)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,173 @@
+"""
+Token-budgeted context assembly for RAGChain
+
+Joining the top-k chunks as-is wastes prompt tokens: neighbouring chunks of
+the same document repeat up to chunk_overlap characters, near-duplicate chunks
+crowd out other sources, and a larger k grows the prompt without bound.
+
+ContextBuilder instead:
+1. Over-fetches `fetch_k` candidates together with their stored embeddings
+2. Drops exact duplicates and chunks contained in another chunk
+3. Optionally re-ranks with MMR (maximal marginal relevance) for diversity
+4. Trims text a chunk shares with an already selected chunk of the same document
+5. Packs chunks in rank order until the token budget is used up
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .tokens import count_tokens
+
+
+def _source_key(doc: Document):
+    metadata = doc.metadata or {}
+    return metadata.get("document_id", metadata.get("source"))
+
+
+def overlap_length(first: str, second: str, min_overlap: int = 20, max_overlap: int = 1000) -> int:
+    """Length of the longest suffix of `first` that is also a prefix of `second`"""
+    longest = min(len(first), len(second), max_overlap)
+    for length in range(longest, min_overlap - 1, -1):
+        if first.endswith(second[:length]):
+            return length
+    return 0
+
+
+def mmr(query_embedding: Sequence[float], embeddings: Sequence[Sequence[float]], k: int,
+        lambda_mult: float = 0.5) -> List[int]:
+    """
+    Maximal marginal relevance selection.
+
+    Args:
+        query_embedding: Embedded question
+        embeddings: Candidate embeddings
+        k: Number of candidates to select
+        lambda_mult: 1.0 = pure relevance, 0.0 = pure diversity
+
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    if len(embeddings) == 0:
+        return []
+    # Not in place: asarray returns the caller's own array when it is already float32
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / max(np.linalg.norm(query), 1e-12)
+
+    relevance = matrix @ query
+    selected = [int(np.argmax(relevance))]
+    max_similarity = matrix @ matrix[selected[0]]
+    while len(selected) < min(k, len(matrix)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        max_similarity = np.maximum(max_similarity, matrix @ matrix[best])
+    return selected
+
+
+class ContextBuilder:
+    """
+    Args:
+        token_budget: Max tokens of context passed to the LLM
+        fetch_k: Candidates retrieved before dedup / re-ranking
+        use_mmr: Re-rank candidates with MMR using their stored embeddings
+        lambda_mult: MMR relevance/diversity trade-off
+        min_overlap: Shortest shared prefix/suffix (chars) treated as chunk overlap
+        model: Model whose tokenizer is used to count the budget
+        separator: Placed between chunks in the final context
+    """
+
+    def __init__(self, token_budget: int = 2000, fetch_k: int = 20, use_mmr: bool = True,
+                 lambda_mult: float = 0.5, min_overlap: int = 20, model: str = "gpt-4o-mini",
+                 separator: str = "\n\n"):
+        self.token_budget = token_budget
+        self.fetch_k = fetch_k
+        self.use_mmr = use_mmr
+        self.lambda_mult = lambda_mult
+        self.min_overlap = min_overlap
+        self.model = model
+        self.separator = separator
+        self.last_stats: dict = {}
+
+    def retrieve(self, vector_store, question: str, k: int,
+                 embedding: Optional[List[float]] = None, filter=None, source: str = "collection") -> List[Document]:
+        """
+        Over-fetch and re-rank candidates for a question.
+
+        Args:
+            vector_store: VectorStorageManager to search
+            question: The question asked
+            k: Max chunks to keep
+            embedding: Question embedding, if already computed
+            filter: Optional SearchFilter
+            source: "collection", "chunks" or "hybrid" (see VectorStorageManager)
+        """
+        fetch_k = max(self.fetch_k, k)
+        query_embedding, hits = vector_store.similarity_search_with_embeddings(
+            question, k=fetch_k, embedding=embedding, filter=filter, source=source
+        )
+        hits = self._drop_duplicates(hits)
+        if self.use_mmr and hits:
+            order = mmr(query_embedding, [vector for _, vector in hits], k, self.lambda_mult)
+            return [hits[i][0] for i in order]
+        return [doc for doc, _ in hits[:k]]
+
+    def build(self, docs: List[Document], k: Optional[int] = None) -> str:
+        """
+        Trim overlaps and pack ranked chunks into the token budget.
+
+        Args:
+            docs: Chunks, best first
+            k: Max chunks to include (None = as many as fit)
+
+        Returns:
+            Context string for the prompt
+        """
+        docs = [doc for doc, _ in self._drop_duplicates([(doc, None) for doc in docs])]
+        separator_tokens = count_tokens(self.separator, self.model)
+        kept: List[Tuple[object, str]] = []
+        used = 0
+        for doc in docs:
+            if k is not None and len(kept) >= k:
+                break
+            text = self._trim_overlap(doc, kept)
+            tokens = count_tokens(text, self.model)
+            cost = tokens + (separator_tokens if kept else 0)
+            if used + cost > self.token_budget:
+                continue  # a smaller chunk further down may still fit
+            kept.append((_source_key(doc), text))
+            used += cost
+
+        self.last_stats = {"candidates": len(docs), "selected": len(kept), "context_tokens": used}
+        return self.separator.join(text for _, text in kept)
+
+    def _drop_duplicates(self, hits):
+        unique = []
+        for doc, vector in hits:
+            text = doc.page_content.strip()
+            if not text or any(text in other.page_content for other, _ in unique):
+                continue
+            unique.append((doc, vector))
+        return unique
+
+    def _trim_overlap(self, doc: Document, kept: List[Tuple[object, str]]) -> str:
+        text = doc.page_content
+        source = _source_key(doc)
+        if source is None:
+            return text
+        for kept_source, kept_text in kept:
+            if kept_source != source:
+                continue
+            # Chunk continues a kept one: drop the shared prefix
+            shared = overlap_length(kept_text, text, self.min_overlap)
+            if shared:
+                text = text[shared:]
+                continue
+            # Chunk precedes a kept one: drop the shared suffix
+            shared = overlap_length(text, kept_text, self.min_overlap)
+            if shared:
+                text = text[:-shared]
+        return text.strip()
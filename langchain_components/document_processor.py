@@ -1,9 +1,12 @@
-from typing import List                                                                                                                       
+from typing import Iterator, List, Optional, Tuple                                                                                                                       
 from pathlib import Path                                                                                                                      
 from langchain_core.documents import Document                                                                                                 
+from langchain_core.document_loaders import BaseLoader
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, Docx2txtLoader                                                      
 from langchain.text_splitter import RecursiveCharacterTextSplitter  
 
+from .instrumentation import count, span
+
 
 class DocumentProcessor:
     def __init__(self, chunk_size=1000, chunk_overlap=200):
@@ -17,7 +20,9 @@ class DocumentProcessor:
         )
 
     def split_documents(self, documents: List[Document]) -> List[Document]:                                                          
-        chunks = self.text_splitter.split_documents(documents)                                                                            
+        with span("split_documents"):
+            chunks = self.text_splitter.split_documents(documents)                                                                            
+        count("chunks_created", len(chunks))
         return chunks
 
     def process_file(self, file_path: str) -> List[Document]:                                                                                     
@@ -29,19 +34,96 @@ class DocumentProcessor:
         print(f"Created {len(chunks)} chunks")                                                                                                    
         return chunks   
 
-    def load_document(self, file_path):
-        path = Path(file_path)                                                                                                                    
-        file_extension = path.suffix.lower()  # Gets '.pdf', handles uppercase
+    def process_file_streaming(self, file_path: str, batch_size: int = 100) -> Iterator[List[Document]]:
+        """
+            Stream a file as bounded batches of chunks.
+
+            Pages are loaded lazily and split incrementally, so peak memory
+            depends on batch_size rather than on the size of the file.
+
+            Args:
+                file_path: Path to a PDF, DOCX or TXT file
+                batch_size: Number of chunks per yielded batch
+
+            Yields:
+                Lists of at most batch_size chunks, in document order
+        """
+        batch = []
+        total = 0
+        for chunk in self.iter_chunks(file_path):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                total += len(batch)
+                yield batch
+                batch = []
+        if batch:
+            total += len(batch)
+            yield batch
+        print(f"Created {total} chunks")
+
+    def iter_chunks(self, file_path: str) -> Iterator[Document]:
+        """
+            Split pages into chunks as they are loaded.
+
+            The last chunk of each page may continue onto the next page, so it
+            is carried over and re-split together with the next page's text.
+            That keeps chunk boundaries and the chunk_overlap the same as
+            splitting the whole document at once.
+        """
+        carry: Optional[Tuple[str, dict]] = None  # (text, metadata) of the open chunk
+
+        for page in self.lazy_load_document(file_path):
+            if carry is None:
+                prefix, prefix_metadata = "", page.metadata
+                text = page.page_content
+            else:
+                prefix, prefix_metadata = carry
+                text = prefix + "\n\n" + page.page_content
+
+            pieces = self.text_splitter.split_text(text)
+            if not pieces:
+                continue
+
+            offset = 0
+            for piece in pieces[:-1]:
+                start = text.find(piece, offset)
+                if start >= 0:
+                    offset = start + 1
+                # Chunks that begin in the carried-over text belong to the earlier page
+                metadata = prefix_metadata if 0 <= start < len(prefix) else page.metadata
+                yield Document(page_content=piece, metadata=dict(metadata))
+
+            last_start = text.find(pieces[-1], offset)
+            last_metadata = prefix_metadata if 0 <= last_start < len(prefix) else page.metadata
+            carry = (pieces[-1], last_metadata)
+
+        if carry is not None:
+            yield Document(page_content=carry[0], metadata=dict(carry[1]))
+
+    def lazy_load_document(self, file_path) -> Iterator[Document]:
+        """Yield pages one at a time instead of materializing the whole file"""
+        loader = self._get_loader(file_path)
+        if type(loader).lazy_load is BaseLoader.lazy_load:
+            # TextLoader and Docx2txtLoader only implement load(); both return a single page anyway
+            return iter(loader.load())
+        return loader.lazy_load()
+
+    def _get_loader(self, file_path):
+        path = Path(file_path)
+        file_extension = path.suffix.lower()
 
         if file_extension == '.pdf':
-            loader = PyPDFLoader(file_path)
-            content = loader.load()
+            return PyPDFLoader(file_path)
         elif file_extension == '.txt':
-            loader = TextLoader(file_path)
-            content = loader.load()
+            return TextLoader(file_path)
         elif file_extension == '.docx':
-            loader = Docx2txtLoader(file_path)
-            content = loader.load()
-        else:
-            raise ValueError("Unsupported file format")
-        return content
\ No newline at end of file
+            return Docx2txtLoader(file_path)
+        raise ValueError("Unsupported file format")
+
+    def load_document(self, file_path):
+        file_type = Path(file_path).suffix.lower().lstrip(".")
+        with span("load_document", file_type=file_type):
+            pages = self._get_loader(file_path).load()
+        count("documents_loaded", file_type=file_type)
+        count("pages_loaded", len(pages), file_type=file_type)
+        return pages
@@ -0,0 +1,236 @@
+"""
+Content-addressed embedding cache
+
+Embeddings are keyed by (model name, SHA-256 of the normalized text), so the
+same string is only ever sent to the embedding API once per model.
+
+Two tiers:
+- Memory: an in-process LRU (OrderedDict) for hot strings like repeated questions
+- Disk: a SQLite file that survives restarts, so re-ingesting a revised
+  document only pays for the chunks that actually changed
+
+Both tiers hold float32 (array("f")), and every vector handed out is a fresh
+list, so callers get the same values from either tier (and from a miss) and
+cannot mutate cached entries.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from .instrumentation import count, span
+
+# Anchored to the project directory rather than the working directory
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "embeddings.sqlite"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing so trivially different strings share a key"""
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def cache_key(model: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+class SQLiteEmbeddingStore:
+    """Durable tier - one row per (model, text hash), vectors stored as float32 blobs"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, array]:
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob)
+        return found
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache with hit/miss counters.
+
+    Args:
+        max_entries: Size of the in-process LRU tier
+        store: Durable tier (None for memory-only)
+    """
+
+    def __init__(self, max_entries: int = 10000, store: Optional[SQLiteEmbeddingStore] = None):
+        self.max_entries = max_entries
+        self.store = store
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key].tolist()
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.store is not None:
+            from_disk = self.store.get_many(missing)
+            self._remember(from_disk)
+            found.update((key, vector.tolist()) for key, vector in from_disk.items())
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        if not items:
+            return
+        self._remember(items)
+        if self.store is not None:
+            self.store.put_many(items)
+
+    def _remember(self, items: Dict[str, Sequence[float]]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._memory[key] = array("f", vector)  # a float32 copy the caller cannot mutate
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> EmbeddingCache:
+    """
+    Process-wide cache shared by EmbeddingsManager and VectorStorageManager.
+
+    Configured from the environment:
+        EMBEDDING_CACHE_PATH: SQLite file (default DEFAULT_CACHE_PATH, "" for memory-only)
+        EMBEDDING_CACHE_SIZE: Max entries in the memory tier (default 10000)
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = os.getenv("EMBEDDING_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+            store = SQLiteEmbeddingStore(path) if path else None
+            max_entries = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+            _default_cache = EmbeddingCache(max_entries=max_entries, store=store)
+        return _default_cache
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only forwards cache misses to the wrapped model.
+
+    Drop-in replacement anywhere LangChain expects an Embeddings object
+    (e.g. PGVector's `embeddings=` argument).
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache if cache is not None else get_default_cache()
+
+    def _lookup(self, texts: List[str]):
+        keys = [cache_key(self.model, text) for text in texts]
+        found = self.cache.get_many(keys)
+        count("embedding_cache_hits", len(found), model=self.model)
+
+        # Embed each distinct missing string once, even if repeated in the batch
+        to_embed = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in to_embed:
+                to_embed[key] = text
+        count("embedding_cache_misses", len(to_embed), model=self.model)
+        return keys, found, to_embed
+
+    def _store(self, keys, found, to_embed, vectors) -> List[List[float]]:
+        # Rounded to float32 like the cached vectors, so results do not depend on hits
+        new_items = {key: array("f", vector) for key, vector in zip(to_embed.keys(), vectors)}
+        self.cache.put_many(new_items)
+        found.update((key, vector.tolist()) for key, vector in new_items.items())
+        # A key repeated in `texts` gets its own list each time
+        return [list(found[key]) for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embed_documents", model=self.model):
+            keys, found, to_embed = self._lookup(texts)
+            vectors = self.embeddings.embed_documents(list(to_embed.values())) if to_embed else []
+            return self._store(keys, found, to_embed, vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embed_documents", model=self.model):
+            keys, found, to_embed = self._lookup(texts)
+            vectors = await self.embeddings.aembed_documents(list(to_embed.values())) if to_embed else []
+            return self._store(keys, found, to_embed, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        with span("embed_query", model=self.model):
+            key = cache_key(self.model, text)
+            found = self.cache.get_many([key])
+            if key in found:
+                count("embedding_cache_hits", model=self.model)
+                return found[key]
+            count("embedding_cache_misses", model=self.model)
+            vector = array("f", self.embeddings.embed_query(text))
+            self.cache.put_many({key: vector})
+            return vector.tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        with span("embed_query", model=self.model):
+            key = cache_key(self.model, text)
+            found = self.cache.get_many([key])
+            if key in found:
+                count("embedding_cache_hits", model=self.model)
+                return found[key]
+            count("embedding_cache_misses", model=self.model)
+            vector = array("f", await self.embeddings.aembed_query(text))
+            self.cache.put_many({key: vector})
+            return vector.tolist()
@@ -0,0 +1,261 @@
+"""
+Batched, concurrent embedding scheduler
+
+Instead of handing a whole document to one blocking embed call, texts are:
+1. Split into batches that stay under a token budget (and max inputs per request)
+2. Sent concurrently, at most `max_concurrency` requests in flight
+3. Throttled to the configured requests-per-minute / tokens-per-minute limits
+4. Retried with exponential backoff on rate-limit and transient errors
+
+Output order always matches input order.
+
+Retries belong to the scheduler alone: build the wrapped client with
+max_retries=0 (e.g. OpenAIEmbeddings(max_retries=0)), or each scheduled retry
+multiplies into the client's own and bypasses the rate limiter.
+
+To run against a local fake embedding server, point the OpenAI client at it
+with OPENAI_API_BASE (e.g. http://localhost:8001/v1).
+"""
+import asyncio
+import contextlib
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from .instrumentation import count, span
+from .tokens import count_tokens
+
+try:
+    import openai
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+except ImportError:  # pragma: no cover - openai ships with langchain-openai
+    RETRYABLE_ERRORS = (Exception,)
+
+
+def run_sync(coro):
+    """Run a coroutine from sync code, even if an event loop is already running"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Inside a running loop (e.g. FastAPI) - run on a helper thread instead
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class RateLimiter:
+    """
+    Sliding one-minute window over requests and tokens.
+
+    Holds no asyncio primitives, so one limiter can be shared across event
+    loops and calls while still accounting for everything sent recently.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, window: float = 60.0):
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("requests_per_minute and tokens_per_minute must be positive")
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Record the request and return 0, or return how long to wait"""
+        with self._lock:
+            now = time.monotonic()
+            while self._events and now - self._events[0][0] >= self.window:
+                _, expired = self._events.popleft()
+                self._tokens_in_window -= expired
+
+            fits_requests = len(self._events) < self.requests_per_minute
+            # An oversized request is let through once the window is empty
+            fits_tokens = (self._tokens_in_window + tokens <= self.tokens_per_minute
+                           or not self._events)
+            if fits_requests and fits_tokens:
+                self._events.append((now, tokens))
+                self._tokens_in_window += tokens
+                return 0.0
+            return max(self.window - (now - self._events[0][0]), 0.01)
+
+    async def acquire(self, tokens: int) -> None:
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, tokens: int) -> None:
+        """acquire() for sync callers - sleeps the calling thread"""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+
+class EmbeddingScheduler(Embeddings):
+    """
+    Embeddings wrapper that schedules batches of texts against rate limits.
+
+    Args:
+        embeddings: The underlying LangChain embeddings (e.g. OpenAIEmbeddings)
+        model: Model name, used for token counting
+        max_batch_tokens: Token budget per request
+        max_batch_size: Max number of inputs per request
+        max_concurrency: Max requests in flight at once
+        requests_per_minute: RPM limit for the account
+        tokens_per_minute: TPM limit for the account
+        max_retries: Retries per batch before the error is raised
+        backoff_base: First retry delay in seconds (doubled each attempt)
+        backoff_max: Cap on a single retry delay
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str = "text-embedding-3-small",
+        max_batch_tokens: int = 50000,
+        max_batch_size: int = 512,
+        max_concurrency: int = 4,
+        requests_per_minute: int = 3000,
+        tokens_per_minute: int = 1000000,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    @classmethod
+    def from_env(cls, embeddings: Embeddings, model: str = "text-embedding-3-small") -> "EmbeddingScheduler":
+        """Build a scheduler from EMBEDDING_* environment variables"""
+        return cls(
+            embeddings,
+            model=model,
+            max_batch_tokens=int(os.getenv("EMBEDDING_BATCH_TOKENS", "50000")),
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "512")),
+            max_concurrency=int(os.getenv("EMBEDDING_CONCURRENCY", "4")),
+            requests_per_minute=int(os.getenv("EMBEDDING_RPM", "3000")),
+            tokens_per_minute=int(os.getenv("EMBEDDING_TPM", "1000000")),
+            max_retries=int(os.getenv("EMBEDDING_MAX_RETRIES", "5")),
+        )
+
+    def make_batches(self, texts: List[str]) -> List[Tuple[List[int], int]]:
+        """
+        Group text indices into token-budgeted batches.
+
+        Returns:
+            List of (indices into `texts`, total tokens) per batch
+        """
+        batches = []
+        current, current_tokens = [], 0
+        for i, text in enumerate(texts):
+            tokens = count_tokens(text, self.model)
+            if current and (current_tokens + tokens > self.max_batch_tokens
+                            or len(current) >= self.max_batch_size):
+                batches.append((current, current_tokens))
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append((current, current_tokens))
+        return batches
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        # Honour the server's Retry-After header when there is one
+        response = getattr(error, "response", None)
+        retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * (0.5 + random.random() / 2)  # jitter
+
+    async def _request(self, call, tokens: int, texts: int, semaphore: Optional[asyncio.Semaphore] = None):
+        """
+        One rate-limited API call, retried with backoff. The rate-limit budget
+        is acquired before a `semaphore` slot, so a batch waiting on the
+        limiter (or backing off) does not hold a slot.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(tokens)
+            try:
+                async with semaphore or contextlib.nullcontext():
+                    with span("embedding_request", model=self.model):
+                        result = await call()
+                count("embedding_texts", texts, model=self.model)
+                count("embedding_tokens", tokens, model=self.model)
+                return result
+            except RETRYABLE_ERRORS as error:
+                count("embedding_retries", model=self.model)
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt, error))
+
+    def _request_blocking(self, call, tokens: int, texts: int):
+        """_request for sync calls, which go through the client's sync transport"""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire_blocking(tokens)
+            try:
+                with span("embedding_request", model=self.model):
+                    result = call()
+                count("embedding_texts", texts, model=self.model)
+                count("embedding_tokens", tokens, model=self.model)
+                return result
+            except RETRYABLE_ERRORS as error:
+                count("embedding_retries", model=self.model)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt, error))
+
+    async def _embed_batch(self, texts: List[str], tokens: int, semaphore: asyncio.Semaphore) -> List[List[float]]:
+        return await self._request(lambda: self.embeddings.aembed_documents(texts), tokens, len(texts), semaphore)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        batches = self.make_batches(texts)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            self._embed_batch([texts[i] for i in batch], tokens, semaphore)
+            for batch, tokens in batches
+        ]
+
+        # gather keeps results in task order, so we can scatter them back by index
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        for (batch, _), vectors in zip(batches, await asyncio.gather(*tasks)):
+            for i, vector in zip(batch, vectors):
+                results[i] = vector
+        return results
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return run_sync(self.aembed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._request_blocking(lambda: self.embeddings.embed_query(text), count_tokens(text, self.model), 1)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._request(lambda: self.embeddings.aembed_query(text), count_tokens(text, self.model), 1)
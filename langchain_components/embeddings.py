@@ -1,12 +1,61 @@
-from typing import List, str
+import hashlib
+import math
+import re
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
 
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .embedding_scheduler import EmbeddingScheduler
+
 
 class EmbeddingsManager:
-    def __init__(self, model: str = "text-embedding-3-small"):
+    def __init__(self, model: str = "text-embedding-3-small", cache: Optional[EmbeddingCache] = None):
         load_dotenv()  # Load environment variables from .env file
-        self.embeddings = OpenAIEmbeddings(model=model)
+        self.model = model
+        # Cache misses go through the scheduler: token-budgeted, concurrent, rate-limited batches
+        self.scheduler = EmbeddingScheduler.from_env(OpenAIEmbeddings(model=model, max_retries=0), model=model)
+        self.embeddings = CachedEmbeddings(self.scheduler, model=model, cache=cache)
 
     def embed_documents(self, documents: List[str]) -> List[List[float]]:
         return self.embeddings.embed_documents(documents)
+
+    async def aembed_documents(self, documents: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters for the embedding cache"""
+        return self.embeddings.cache.stats()
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic, offline stand-in for OpenAI embeddings.
+
+    Each lowercase word is hashed into one of `dimensions` buckets with a +/-1
+    sign and the result is L2-normalized, so texts sharing words get a high
+    cosine similarity. No network, no API key, identical output on every run -
+    for tests, benchmarks and offline runs of the whole RAG pipeline.
+    """
+
+    def __init__(self, dimensions: int = 1536):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
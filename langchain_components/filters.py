@@ -0,0 +1,91 @@
+"""
+Search filters shared by every retrieval path
+
+A SearchFilter restricts a search to some documents, file types, an upload
+date range and/or chunks whose metadata contains given key/values. It is
+applied BEFORE the top-k is taken, so a filtered search still returns k
+results whenever k matching chunks exist:
+- PGVector collection: JSONB conditions on cmetadata (GIN-indexed)
+- document_chunks: SQL conditions + iterative index scans (database.search)
+- local backend: matching rows are selected first, then scored
+
+For the collection and the local backend the fields are read from chunk
+metadata: "document_id" (int), "file_type" and "uploaded_at" (UTC ISO-8601,
+see utc_isoformat), stamped by VectorStorageManager when documents are added.
+
+Dates are compared in UTC; naive datetimes are taken to be UTC.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence
+
+
+def to_utc(moment: datetime) -> datetime:
+    """Aware UTC datetime (naive values are assumed to already be UTC)"""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def utc_isoformat(moment: datetime) -> str:
+    """Fixed-width UTC ISO-8601, so stamped and filter values also compare correctly as strings"""
+    return to_utc(moment).isoformat(timespec="microseconds")
+
+
+@dataclass
+class SearchFilter:
+    """
+    Attributes:
+        document_ids: Only chunks of these documents
+        file_types: Only these file types (pdf, docx, txt)
+        uploaded_after: Only documents uploaded at or after this time
+        uploaded_before: Only documents uploaded at or before this time
+        metadata: Key/values the chunk metadata must contain, e.g. {"tenant": "acme"}
+    """
+    document_ids: Optional[Sequence[int]] = None
+    file_types: Optional[Sequence[str]] = None
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        if self.document_ids:
+            self.document_ids = [int(document_id) for document_id in self.document_ids]
+        if self.uploaded_after:
+            self.uploaded_after = to_utc(self.uploaded_after)
+        if self.uploaded_before:
+            self.uploaded_before = to_utc(self.uploaded_before)
+
+    def is_empty(self) -> bool:
+        return not (self.document_ids or self.file_types or self.uploaded_after
+                    or self.uploaded_before or self.metadata)
+
+    def contains(self) -> Dict[str, Any]:
+        """
+        Conditions expressible as one JSONB containment (@>), which the GIN
+        index on the metadata column answers directly. Single-value document
+        and file type lists are folded in.
+        """
+        contains = dict(self.metadata or {})
+        if self.document_ids and len(self.document_ids) == 1:
+            contains["document_id"] = self.document_ids[0]
+        if self.file_types and len(self.file_types) == 1:
+            contains["file_type"] = self.file_types[0]
+        return contains
+
+    def matches(self, metadata: Dict[str, Any]) -> bool:
+        """Evaluate the filter against one chunk's metadata (local backend)"""
+        if self.document_ids and metadata.get("document_id") not in self.document_ids:
+            return False
+        if self.file_types and metadata.get("file_type") not in self.file_types:
+            return False
+        if self.uploaded_after or self.uploaded_before:
+            uploaded_at = metadata.get("uploaded_at")
+            if uploaded_at is None:
+                return False
+            uploaded_at = to_utc(datetime.fromisoformat(uploaded_at))
+            if self.uploaded_after and uploaded_at < self.uploaded_after:
+                return False
+            if self.uploaded_before and uploaded_at > self.uploaded_before:
+                return False
+        return all(metadata.get(key) == value for key, value in (self.metadata or {}).items())
@@ -0,0 +1,157 @@
+"""
+Incremental re-ingestion
+
+Each document stores a hash of the file and each chunk a hash of its text.
+When a file is re-ingested, the new chunk sequence is diffed against the
+stored one:
+- unchanged chunks keep their rows and embeddings (only chunk_index and
+  metadata may change)
+- new or modified chunks are embedded and inserted
+- chunks that no longer exist are deleted
+
+An unchanged file (same file hash) is skipped before it is even parsed.
+"""
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session, load_only
+
+from database import DocumentChunk
+from database.bulk_insert import ChunkRow, copy_chunk_rows
+
+from .embeddings import EmbeddingsManager
+from .instrumentation import count, span
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in blocks so large files are not loaded at once"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ChunkDiff:
+    """
+    Result of diffing stored chunks against a new chunk sequence.
+
+    Attributes:
+        keep: (row id, new chunk_index) for chunks whose text is unchanged
+        add: Positions in the new sequence that need embedding and inserting
+        delete: Row ids of chunks that are gone
+    """
+    keep: List[Tuple[int, int]] = field(default_factory=list)
+    add: List[int] = field(default_factory=list)
+    delete: List[int] = field(default_factory=list)
+
+
+def diff_chunks(stored: List[Tuple[int, str, int]], new_hashes: List[str]) -> ChunkDiff:
+    """
+    Match new chunks to stored rows by content hash.
+
+    Args:
+        stored: (row id, content hash, chunk_index) of the rows already stored
+        new_hashes: Content hash of each new chunk, in order
+
+    Returns:
+        ChunkDiff describing what to keep, add and delete
+    """
+    # Repeated chunks (boilerplate headers etc.) are matched in document order
+    available = defaultdict(list)
+    for row_id, content_hash, _ in sorted(stored, key=lambda row: row[2], reverse=True):
+        available[content_hash].append(row_id)
+
+    diff = ChunkDiff()
+    for position, content_hash in enumerate(new_hashes):
+        rows = available.get(content_hash)
+        if rows:
+            diff.keep.append((rows.pop(), position))
+        else:
+            diff.add.append(position)
+
+    diff.delete = [row_id for rows in available.values() for row_id in rows]
+    return diff
+
+
+def updated_rows(stored: Dict[int, Tuple[int, dict]], keep: List[Tuple[int, int]],
+                 chunks: List[Tuple[str, dict]]) -> List[dict]:
+    """
+    Update mappings for kept rows whose chunk_index or metadata changed.
+
+    Args:
+        stored: Row id -> (chunk_index, metadata) as stored
+        keep: ChunkDiff.keep
+        chunks: (text, metadata) pairs in document order
+
+    Returns:
+        Mappings for Session.bulk_update_mappings (empty when nothing changed)
+    """
+    return [
+        {"id": row_id, "chunk_index": position, "chunk_metadata": chunks[position][1]}
+        for row_id, position in keep
+        if stored[row_id] != (position, chunks[position][1])
+    ]
+
+
+def sync_document_chunks(
+    db: Session,
+    document_id: int,
+    chunks: List[Tuple[str, dict]],
+    embedder: EmbeddingsManager,
+    batch_size: int = 256,
+) -> ChunkDiff:
+    """
+    Bring a document's stored chunks in line with a freshly split chunk list.
+
+    Only chunks in `diff.add` are embedded. The caller owns the transaction.
+
+    Args:
+        db: Open session
+        document_id: Document whose chunks are synced
+        chunks: (text, metadata) pairs in document order
+        embedder: Used for new and modified chunks only
+        batch_size: Chunks per embedding call / insert flush
+    """
+    rows = (
+        db.query(DocumentChunk)
+        .options(load_only(DocumentChunk.id, DocumentChunk.content_hash, DocumentChunk.chunk_index,
+                           DocumentChunk.chunk_metadata))
+        .filter(DocumentChunk.document_id == document_id)
+        .all()
+    )
+    hashes = [chunk_hash(text) for text, _ in chunks]
+    diff = diff_chunks([(row.id, row.content_hash, row.chunk_index) for row in rows], hashes)
+
+    if diff.delete:
+        db.query(DocumentChunk).filter(DocumentChunk.id.in_(diff.delete)).delete(synchronize_session=False)
+
+    # Same text, so same embedding - but the position or metadata (page, section) may have changed
+    changed = updated_rows({row.id: (row.chunk_index, row.chunk_metadata) for row in rows}, diff.keep, chunks)
+    if changed:
+        db.bulk_update_mappings(DocumentChunk, changed)
+
+    def new_rows():
+        for start in range(0, len(diff.add), batch_size):
+            positions = diff.add[start:start + batch_size]
+            vectors = embedder.embed_documents([chunks[position][0] for position in positions])
+            for position, vector in zip(positions, vectors):
+                text, metadata = chunks[position]
+                yield ChunkRow(document_id, text, position, vector, metadata, hashes[position])
+
+    # COPY inside the session's own transaction, so the sync stays atomic
+    db.flush()
+    # copy_expert bypasses SQLAlchemy's cursor events, so time the COPY here (the span
+    # includes embedding the rows it streams - see the embed spans for that share)
+    with span("copy_chunks"):
+        copied = copy_chunk_rows(db.connection().connection, new_rows(), batch_size=batch_size)
+    count("chunks_copied", copied)
+
+    return diff
@@ -0,0 +1,317 @@
+"""
+Parallel multi-file ingestion
+
+Usage:
+    python -m langchain_components.ingest DIR [--workers 8] [--writers 2]
+
+Pipeline:
+1. Parse + split files across a process pool (pypdf text extraction is CPU-bound),
+   streaming pages through DocumentProcessor.iter_chunks
+2. Push each file's chunks onto a bounded queue
+3. Writer threads diff the chunks against what is stored, embed only new or
+   modified chunks, and insert/delete DocumentChunk rows (see incremental.py)
+
+Per-file status and content hash are recorded on the documents table, so
+re-running the same command after an interruption - or as a nightly re-sync -
+skips files that already completed and have not changed.
+
+The chunks land in document_chunks, not in a PGVector collection: answer
+from them with RAGChain(store, retrieval="chunks") or retrieval="hybrid".
+"""
+import argparse
+import os
+import queue
+import traceback
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from database import SessionLocal, Document, DocumentChunk, engine
+
+from .document_processor import DocumentProcessor
+from .embeddings import EmbeddingsManager
+from .incremental import file_hash, sync_document_chunks
+from .instrumentation import instrument_engine
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt"}
+
+# (text, metadata) pairs - plain tuples pickle cheaply between processes
+ParsedChunks = List[Tuple[str, dict]]
+
+_processor = None
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int) -> None:
+    global _processor
+    _processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _parse_file(path: str, known_hash: Optional[str]) -> Tuple[str, Optional[ParsedChunks]]:
+    """
+    Runs in a pool process: hash, load and split one file.
+
+    Pages are loaded lazily and split as they arrive (DocumentProcessor.iter_chunks),
+    so a worker holds the file's chunk texts but never the whole extracted document.
+
+    Returns:
+        (file hash, chunks), with chunks None when the file is unchanged
+    """
+    current_hash = file_hash(path)
+    if current_hash == known_hash:
+        return current_hash, None
+    return current_hash, [(chunk.page_content, chunk.metadata) for chunk in _processor.iter_chunks(path)]
+
+
+def discover_files(directory: str) -> List[Path]:
+    return sorted(
+        path for path in Path(directory).rglob("*")
+        if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+class IngestStats:
+    """Thread-safe throughput counters"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.files_done = 0
+        self.files_unchanged = 0
+        self.files_failed = 0
+        self.chunks = 0
+        self._lock = threading.Lock()
+
+    def record(self, chunks: int = 0, failed: bool = False, unchanged: bool = False) -> None:
+        with self._lock:
+            if failed:
+                self.files_failed += 1
+            elif unchanged:
+                self.files_unchanged += 1
+            else:
+                self.files_done += 1
+                self.chunks += chunks
+
+    def report(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (
+            f"{self.files_done} files ({self.files_unchanged} unchanged, {self.files_failed} failed), "
+            f"{self.chunks} chunks embedded "
+            f"in {elapsed:.1f}s - {self.files_done / elapsed:.2f} files/s, "
+            f"{self.chunks / elapsed:.1f} chunks/s"
+        )
+
+
+def register_files(paths: List[Path], retry_failed: bool = True) -> Dict[str, Tuple[int, Optional[str]]]:
+    """
+    Create (or reuse) a documents row per file.
+
+    Completed files are still returned with their stored hash, so workers can
+    skip them cheaply when unchanged and re-sync them when edited.
+
+    Returns:
+        Mapping of source path -> (document id, stored file hash or None)
+    """
+    todo = {}
+    db = SessionLocal()
+    try:
+        existing = {
+            doc.source_path: doc
+            for doc in db.query(Document).filter(Document.source_path.in_([str(p) for p in paths]))
+        }
+        for path in paths:
+            doc = existing.get(str(path))
+            if doc is not None and doc.status == "failed" and not retry_failed:
+                continue
+            if doc is None:
+                doc = Document(
+                    filename=path.name,
+                    file_type=path.suffix.lower().lstrip("."),
+                    source_path=str(path),
+                    status="pending",
+                )
+                db.add(doc)
+            todo[str(path)] = doc
+        db.commit()
+        return {
+            path: (doc.id, doc.content_hash if doc.status == "completed" else None)
+            for path, doc in todo.items()
+        }
+    finally:
+        db.close()
+
+
+def mark_failed(document_id: int, error: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Document).filter(Document.id == document_id).update(
+            {"status": "failed", "error": error[:2000]}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def store_chunks(document_id: int, content_hash: str, chunks: ParsedChunks,
+                 embedder: EmbeddingsManager, batch_size: int) -> int:
+    """
+    Sync one file's chunks and mark it completed - all in one transaction.
+
+    Returns:
+        Number of chunks that had to be embedded
+    """
+    db = SessionLocal()
+    try:
+        diff = sync_document_chunks(db, document_id, chunks, embedder, batch_size)
+        db.query(Document).filter(Document.id == document_id).update(
+            {"status": "completed", "error": None, "chunk_count": len(chunks), "content_hash": content_hash}
+        )
+        db.commit()
+        return len(diff.add)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _writer(work: "queue.Queue", embedder: EmbeddingsManager, stats: IngestStats, batch_size: int) -> None:
+    while True:
+        item = work.get()
+        if item is None:
+            return
+        document_id, content_hash, chunks = item
+        try:
+            embedded = store_chunks(document_id, content_hash, chunks, embedder, batch_size)
+            stats.record(chunks=embedded)
+        except Exception as error:
+            stats.record(failed=True)
+            try:
+                mark_failed(document_id, f"store: {error}")
+            except Exception:
+                # Losing the status row is recoverable (the file is retried next run); losing the thread is not
+                print(f"❌ Could not mark document {document_id} as failed:")
+                traceback.print_exc()
+
+
+def _put(work: "queue.Queue", item, writer_threads: List[threading.Thread], timeout: float = 5.0) -> None:
+    """Queue parsed chunks for the writers without blocking forever if they have all died"""
+    while True:
+        try:
+            work.put(item, timeout=timeout)
+            return
+        except queue.Full:
+            if not any(thread.is_alive() for thread in writer_threads):
+                raise RuntimeError("All writer threads have exited - aborting ingestion")
+
+
+def ingest_directory(
+    directory: str,
+    workers: Optional[int] = None,
+    writers: int = 2,
+    batch_size: int = 256,
+    queue_size: int = 16,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    retry_failed: bool = True,
+    report_every: float = 10.0,
+) -> IngestStats:
+    """
+    Ingest every supported file under `directory`.
+
+    Args:
+        directory: Root directory to scan recursively
+        workers: Parser processes (defaults to the CPU count)
+        writers: Threads embedding and inserting chunks
+        batch_size: Chunks per embedding call / insert flush
+        queue_size: Max parsed files waiting for the writers (bounds memory)
+        chunk_size: Passed to DocumentProcessor
+        chunk_overlap: Passed to DocumentProcessor
+        retry_failed: Re-process files whose last attempt failed
+        report_every: Seconds between progress lines
+
+    Returns:
+        Final IngestStats
+    """
+    workers = workers or os.cpu_count() or 1
+    instrument_engine(engine)  # no-op unless METRICS_ENABLED: per-statement timings, COPY included
+    paths = discover_files(directory)
+    todo = register_files(paths, retry_failed=retry_failed)
+    print(f"Found {len(paths)} files, checking {len(todo)} for changes")
+
+    stats = IngestStats()
+    work: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    embedder = EmbeddingsManager()
+    writer_threads = [
+        threading.Thread(target=_writer, args=(work, embedder, stats, batch_size), daemon=True)
+        for _ in range(writers)
+    ]
+    for thread in writer_threads:
+        thread.start()
+
+    pending_paths = deque(todo)
+    last_report = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(chunk_size, chunk_overlap)) as pool:
+        in_flight = {}
+        while pending_paths or in_flight:
+            # Keep a couple of files per worker in flight without submitting everything at once
+            while pending_paths and len(in_flight) < workers * 2:
+                path = pending_paths.popleft()
+                in_flight[pool.submit(_parse_file, path, todo[path][1])] = path
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                document_id = todo[path][0]
+                try:
+                    content_hash, chunks = future.result()
+                except Exception as error:
+                    mark_failed(document_id, f"parse: {error}")
+                    stats.record(failed=True)
+                    continue
+                if chunks is None:
+                    stats.record(unchanged=True)
+                    continue
+                _put(work, (document_id, content_hash, chunks), writer_threads)  # blocks when writers fall behind
+
+            if time.perf_counter() - last_report >= report_every:
+                print(stats.report())
+                last_report = time.perf_counter()
+
+    for _ in writer_threads:
+        _put(work, None, writer_threads)
+    for thread in writer_threads:
+        thread.join()
+
+    print(f"✅ {stats.report()}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a directory of PDF/DOCX/TXT files")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--writers", type=int, default=2, help="Embedding/insert threads")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--skip-failed", action="store_true", help="Do not retry files that failed before")
+    args = parser.parse_args()
+
+    ingest_directory(
+        args.directory,
+        workers=args.workers,
+        writers=args.writers,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        retry_failed=not args.skip_failed,
+    )
+
+
+if __name__ == "__main__":
+    main()
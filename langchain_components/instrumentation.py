@@ -0,0 +1,411 @@
+"""
+Pluggable timing spans and counters for the ingestion and query hot paths
+
+Call sites use the module-level helpers:
+
+    with span("similarity_search", backend="pgvector"):
+        ...
+    count("chunks_created", len(chunks))
+
+They delegate to the current Instrumentation:
+- Instrumentation (default): no-op - a span is a shared do-nothing context
+  manager, so instrumented code costs a function call when metrics are off
+- MetricsRegistry: in-process histograms and counters, rendered in the
+  Prometheus text exposition format (render_prometheus / serve_metrics)
+- Any subclass, e.g. one forwarding to OpenTelemetry, via set_instrumentation
+
+Slow SQL: instrument_engine() times every statement on an engine and, for
+a sample of vector searches slower than a threshold, re-runs them with
+EXPLAIN (ANALYZE, BUFFERS) on a background thread and its own connection -
+never inside the caller's transaction or on the request path. The SET LOCAL
+search settings the caller's transaction had made are replayed first, so
+the plan matches the query that was slow.
+
+Configured from the environment:
+    METRICS_ENABLED: "1" to collect metrics (default off)
+    METRICS_PORT: Serve /metrics on this port when set
+    METRICS_HOST: Interface /metrics listens on (default 127.0.0.1)
+    EXPLAIN_SLOW_MS: Vector searches slower than this get EXPLAINed (default 0 = off)
+    EXPLAIN_SAMPLE_RATE: Fraction of slow searches to EXPLAIN (default 0.1)
+"""
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "doc_analyser"
+
+# Seconds - from sub-millisecond cache hits to multi-second LLM generations
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Instrumentation:
+    """No-op base: subclass and override span/count/observe to export elsewhere"""
+
+    enabled = False
+
+    def span(self, name: str, labels: Dict[str, str]):
+        return _NOOP_SPAN
+
+    def count(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        pass
+
+    def observe(self, name: str, seconds: float, labels: Dict[str, str]) -> None:
+        pass
+
+    def record_slow_query(self, statement: str, seconds: float, plan: str) -> None:
+        pass
+
+
+class _Span:
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.registry.observe(self.name, time.perf_counter() - self.started, self.labels)
+        if exc_type is not None:
+            self.registry.count("span_errors", 1, {"span": self.name, **self.labels})
+        return False
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "observations")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.total = 0.0
+        self.observations = 0
+
+
+class MetricsRegistry(Instrumentation):
+    """
+    Thread-safe in-process metrics.
+
+    Args:
+        buckets: Histogram upper bounds in seconds
+        max_slow_queries: How many EXPLAIN ANALYZE plans to keep
+    """
+
+    enabled = True
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, max_slow_queries: int = 20):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[LabelKey, _Histogram] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.slow_queries: Deque[dict] = deque(maxlen=max_slow_queries)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def span(self, name: str, labels: Dict[str, str]):
+        return _Span(self, name, labels)
+
+    def count(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, labels: Dict[str, str]) -> None:
+        key = self._key({"span": name, **labels})
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram.counts[i] += 1
+                    break
+            histogram.total += seconds
+            histogram.observations += 1
+
+    def record_slow_query(self, statement: str, seconds: float, plan: str) -> None:
+        self.count("slow_queries_explained", 1, {})
+        with self._lock:
+            self.slow_queries.append({"statement": statement, "seconds": seconds, "plan": plan,
+                                      "at": time.time()})
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.slow_queries.clear()
+
+    def snapshot(self) -> dict:
+        """Plain-dict view: span count/sum per label set and counter values"""
+        with self._lock:
+            spans = {
+                _format_labels(key): {"count": h.observations, "sum": h.total}
+                for key, h in self._histograms.items()
+            }
+            counters = {
+                name: {_format_labels(key): value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+        return {"spans": spans, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            if self._histograms:
+                family = f"{PREFIX}_span_duration_seconds"
+                lines.append(f"# HELP {family} Duration of instrumented operations")
+                lines.append(f"# TYPE {family} histogram")
+                for key, histogram in sorted(self._histograms.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f"{family}_bucket{_format_labels(key + (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{family}_bucket{_format_labels(key + (('le', '+Inf'),))} {histogram.observations}")
+                    lines.append(f"{family}_sum{_format_labels(key)} {histogram.total}")
+                    lines.append(f"{family}_count{_format_labels(key)} {histogram.observations}")
+            for name, series in sorted(self._counters.items()):
+                family = f"{PREFIX}_{name}_total"
+                lines.append(f"# TYPE {family} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{family}{_format_labels(key)} {int(value) if value.is_integer() else value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+_current: Optional[Instrumentation] = None
+_current_lock = threading.Lock()
+
+
+def get_instrumentation() -> Instrumentation:
+    """Process-wide instrumentation, created from the environment on first use"""
+    global _current
+    if _current is None:
+        with _current_lock:
+            if _current is None:
+                if os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes"):
+                    _current = MetricsRegistry()
+                    port = os.getenv("METRICS_PORT")
+                    if port:
+                        serve_metrics(_current, int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
+                else:
+                    _current = Instrumentation()
+    return _current
+
+
+def set_instrumentation(instrumentation: Instrumentation) -> None:
+    """Install an Instrumentation (e.g. a MetricsRegistry in tests or an exporter)"""
+    global _current
+    with _current_lock:
+        _current = instrumentation
+
+
+def span(name: str, **labels):
+    """Time a block: `with span("embed", backend="pgvector"): ...`"""
+    return (_current or get_instrumentation()).span(name, labels)
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """Add `value` to a counter"""
+    instrumentation = _current or get_instrumentation()
+    if instrumentation.enabled:
+        instrumentation.count(name, value, labels)
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """Record a duration measured elsewhere (e.g. RAGChain's QueryTiming)"""
+    instrumentation = _current or get_instrumentation()
+    if instrumentation.enabled:
+        instrumentation.observe(name, seconds, labels)
+
+
+def enabled() -> bool:
+    """Whether metrics are collected - guard work done only for metrics (e.g. token counting)"""
+    return (_current or get_instrumentation()).enabled
+
+
+def serve_metrics(registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread (loopback only unless `host` says otherwise)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+_VECTOR_OPERATORS = ("<=>", "<~>", "<->", "<#>")
+
+
+def _statement_kind(statement: str) -> str:
+    if any(operator in statement for operator in _VECTOR_OPERATORS):
+        return "vector_search"
+    if "@@" in statement:
+        return "text_search"
+    if statement.lstrip().upper().startswith("COPY"):
+        return "copy"
+    return statement.lstrip().split(" ", 1)[0].lower() or "other"
+
+
+def _is_set_local(statement: str) -> bool:
+    return statement.lstrip()[:9].upper() == "SET LOCAL"
+
+
+class _SlowQueryExplainer:
+    """
+    Background thread that EXPLAIN ANALYZEs sampled slow statements on its
+    own pooled connection. The queue is bounded: when the thread falls
+    behind, further samples are dropped rather than queued.
+    """
+
+    def __init__(self, engine, max_pending: int = 8):
+        self.engine = engine
+        self.pending: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, statement: str, parameters, settings: List[str], seconds: float) -> None:
+        try:
+            self.pending.put_nowait((statement, parameters, settings, seconds))
+        except queue.Full:
+            count("slow_queries_dropped")
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="explain-slow-queries", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            statement, parameters, settings, seconds = self.pending.get()
+            try:
+                plan = self.explain(statement, parameters, settings)
+            except Exception as error:  # profiling must never take the thread down
+                plan = f"EXPLAIN failed: {error}"
+            get_instrumentation().record_slow_query(statement, seconds, plan)
+            logger.info("Slow vector search (%.0f ms) - plan recorded", seconds * 1000)
+            self.pending.task_done()
+
+    def explain(self, statement: str, parameters, settings: List[str]) -> str:
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                for setting in settings:
+                    cursor.execute(setting)
+                # ANALYZE executes the statement; the rollback undoes it and the SET LOCALs
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.close()
+                connection.rollback()
+        finally:
+            connection.close()
+
+
+def instrument_engine(engine, slow_ms: Optional[float] = None, sample_rate: Optional[float] = None) -> None:
+    """
+    Time every statement on a SQLAlchemy engine and EXPLAIN a sample of slow
+    vector searches in the background. Idempotent; does nothing while
+    metrics are disabled.
+
+    Args:
+        engine: Engine to instrument
+        slow_ms: Threshold for EXPLAIN ANALYZE (default EXPLAIN_SLOW_MS, 0 = never)
+        sample_rate: Fraction of slow searches to EXPLAIN (default EXPLAIN_SAMPLE_RATE)
+    """
+    if not enabled() or getattr(engine, "_doc_analyser_instrumented", False):
+        return
+    from sqlalchemy import event
+
+    slow_seconds = (slow_ms if slow_ms is not None else float(os.getenv("EXPLAIN_SLOW_MS", "0"))) / 1000
+    sample_rate = sample_rate if sample_rate is not None else float(os.getenv("EXPLAIN_SAMPLE_RATE", "0.1"))
+    explainer = _SlowQueryExplainer(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _is_set_local(statement):
+            # Replayed before a background EXPLAIN of a later statement in this transaction
+            conn.info.setdefault("_set_local", []).append(statement)
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("_query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def _end_transaction(conn):
+        conn.info.pop("_set_local", None)
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info.pop("_set_local", None)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["_query_started"].pop()
+        elapsed = time.perf_counter() - started
+        kind = _statement_kind(statement)
+        observe("sql", elapsed, kind=kind)
+
+        if (kind == "vector_search" and slow_seconds > 0 and elapsed >= slow_seconds
+                and not executemany and random.random() < sample_rate):
+            explainer.submit(statement, parameters, list(conn.info.get("_set_local", ())), elapsed)
+
+    engine._slow_query_explainer = explainer
+    engine._doc_analyser_instrumented = True
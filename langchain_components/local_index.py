@@ -0,0 +1,513 @@
+"""
+Local in-process vector index (NumPy + mmap)
+
+An alternative backend to PGVector for edge deployments, test rigs and fully
+offline runs. Everything lives in one directory:
+
+    vectors.f32 / vectors.f16   row-major matrix of L2-normalized embeddings
+    records.jsonl               one JSON line per row (id, page_content, metadata)
+    offsets.i64                 byte offset of each line in records.jsonl
+    index.json                  header: dimensions, dtype, row count, records size
+    ivf.npz                     optional IVF partitioning (centroids + assignments)
+    index.lock                  flock target that serializes writers
+
+Vectors and offsets are memory-mapped, so opening even a large index is
+near-instant - pages are read on demand. Because rows are normalized, cosine
+similarity is a single matrix-vector product, and top-k uses argpartition
+instead of a full sort.
+
+Filtered searches select rows from in-memory columns of the metadata
+(_MetadataIndex), read from records.jsonl once on the first filtered search
+and extended as rows are appended.
+
+Several processes may share an index. Appends (and build_ivf) hold an
+exclusive flock on index.lock and re-read the header before writing, so a
+writer never appends from a stale row count; searches re-read the header when
+it changed (one stat per search) and see rows appended elsewhere. Without
+fcntl (Windows) there is no lock and only one process may write.
+"""
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .filters import SearchFilter, to_utc
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: single writer only
+    fcntl = None
+
+_DTYPES = {"float32": (np.float32, "vectors.f32"), "float16": (np.float16, "vectors.f16")}
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NO_DATE = np.iinfo(np.int64).min
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores per row, best first"""
+    k = min(k, scores.shape[-1])
+    if k == 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1)
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Identity of a file's current version - os.replace gives it a new inode"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _microseconds(moment: datetime) -> int:
+    return (to_utc(moment) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+class _MetadataIndex:
+    """
+    In-memory columns of the row metadata that SearchFilter reads, so a
+    filtered search picks its rows with a few vectorized comparisons instead
+    of parsing records.jsonl. Every key is dictionary-encoded (an int32 code
+    per row, -1 where the row lacks the key); uploaded_at is also kept as UTC
+    microseconds for range filters.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._codes: Dict[str, np.ndarray] = {}
+        self._values: Dict[str, Dict[str, int]] = {}
+        self._uploaded_at = np.empty((0,), dtype=np.int64)
+
+    def extend(self, metadatas: Sequence[dict]) -> None:
+        added = len(metadatas)
+        new_codes: Dict[str, np.ndarray] = {}
+        uploaded_at = np.full(added, _NO_DATE, dtype=np.int64)
+        for row, metadata in enumerate(metadatas):
+            for key, value in metadata.items():
+                values = self._values.setdefault(key, {})
+                codes = new_codes.setdefault(key, np.full(added, -1, dtype=np.int32))
+                codes[row] = values.setdefault(_canonical(value), len(values))
+            stamp = metadata.get("uploaded_at")
+            if isinstance(stamp, str):
+                try:
+                    uploaded_at[row] = _microseconds(datetime.fromisoformat(stamp))
+                except ValueError:
+                    pass
+
+        for key in set(self._codes) | set(new_codes):
+            self._codes[key] = np.concatenate([
+                self._codes.get(key, np.full(self.count, -1, dtype=np.int32)),
+                new_codes.get(key, np.full(added, -1, dtype=np.int32)),
+            ])
+        self._uploaded_at = np.concatenate([self._uploaded_at, uploaded_at])
+        self.count += added
+
+    def select(self, search_filter: SearchFilter) -> np.ndarray:
+        """Rows matching the filter - the same rows SearchFilter.matches accepts"""
+        mask = np.ones(self.count, dtype=bool)
+        if search_filter.document_ids:
+            mask &= self._isin("document_id", search_filter.document_ids)
+        if search_filter.file_types:
+            mask &= self._isin("file_type", search_filter.file_types)
+        if search_filter.uploaded_after or search_filter.uploaded_before:
+            mask &= self._uploaded_at != _NO_DATE
+            if search_filter.uploaded_after:
+                mask &= self._uploaded_at >= _microseconds(search_filter.uploaded_after)
+            if search_filter.uploaded_before:
+                mask &= self._uploaded_at <= _microseconds(search_filter.uploaded_before)
+        for key, value in (search_filter.metadata or {}).items():
+            mask &= self._isin(key, [value])
+        return np.flatnonzero(mask).astype(np.int64)
+
+    def _isin(self, key: str, values: Sequence) -> np.ndarray:
+        codes = self._codes.get(key, np.full(self.count, -1, dtype=np.int32))
+        known = self._values.get(key, {})
+        wanted = [known[_canonical(value)] for value in values if _canonical(value) in known]
+        if any(value is None for value in values):
+            wanted.append(-1)  # metadata.get(key) == None also holds for rows without the key
+        return np.isin(codes, wanted)
+
+
+class LocalVectorStore:
+    """
+    Memory-mapped vector store with cosine top-k search.
+
+    Args:
+        path: Directory holding the index files (created if missing)
+        embeddings: LangChain embeddings used for documents and queries
+        dtype: "float32" or "float16" (half the disk and page-cache footprint)
+        search_block_size: Rows scored per block, bounds temporary memory
+    """
+
+    def __init__(self, path: str, embeddings: Embeddings, dtype: str = "float32",
+                 search_block_size: int = 65536):
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.embeddings = embeddings
+        self.search_block_size = search_block_size
+        self._header_path = self.path / "index.json"
+        self._lock_path = self.path / "index.lock"
+
+        header = json.loads(self._header_path.read_text()) if self._header_path.exists() else {}
+        dtype = header.get("dtype", dtype)  # an existing index keeps its own dtype
+        self.dtype = dtype
+        self._np_dtype, vectors_name = _DTYPES[dtype]
+        self._vectors_path = self.path / vectors_name
+        self._records_path = self.path / "records.jsonl"
+        self._offsets_path = self.path / "offsets.i64"
+        self._ivf_path = self.path / "ivf.npz"
+
+        self._vectors = None
+        self._offsets = None
+        self._metadata: Optional[_MetadataIndex] = None
+        self._centroids = None
+        self._assignments = None
+        self._ivf_stamp = None
+        # Under the writers' lock: another process may be mid-append past the header
+        with self._locked():
+            self._load_header()
+            self._truncate_uncommitted()
+        self._remap()
+        self._load_ivf()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive cross-process lock for writers (released when the file closes)"""
+        with open(self._lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _load_header(self) -> None:
+        self._header_stamp = _stamp(self._header_path)
+        header = json.loads(self._header_path.read_text()) if self._header_stamp is not None else {}
+        self.dimensions = header.get("dimensions")
+        self.count = header.get("count", 0)
+        self._records_bytes = header.get("records_bytes")
+        if self._records_bytes is None:  # header written before records_bytes was tracked
+            self._records_bytes = self._committed_records_size()
+
+    def _refresh(self) -> None:
+        """Pick up rows (or an IVF) another process wrote since this instance last looked"""
+        if _stamp(self._header_path) != self._header_stamp:
+            count = self.count
+            self._load_header()
+            if self.count != count:
+                self._remap()
+        self._load_ivf()
+
+    def _load_ivf(self) -> None:
+        stamp = _stamp(self._ivf_path)
+        if stamp is not None and stamp != self._ivf_stamp:
+            with np.load(self._ivf_path) as ivf:
+                self._centroids = ivf["centroids"]
+                self._assignments = ivf["assignments"]
+        self._ivf_stamp = stamp
+        if self._centroids is None:
+            return
+        # Saved by a writer whose header this instance has not read yet
+        self._assignments = self._assignments[:self.count]
+        if len(self._assignments) < self.count:
+            # Crashed between the header and the IVF update: assign the missing rows
+            missing = np.asarray(self._vectors[len(self._assignments):], dtype=np.float32)
+            self._assignments = np.concatenate([self._assignments, self._assign(missing)])
+
+    def _save_ivf(self) -> None:
+        tmp = self.path / "ivf.npz.tmp"
+        with open(tmp, "wb") as handle:
+            np.savez(handle, centroids=self._centroids, assignments=self._assignments)
+        os.replace(tmp, self._ivf_path)
+        self._ivf_stamp = _stamp(self._ivf_path)
+
+    def _truncate_uncommitted(self) -> None:
+        """
+        Cut every file back to the rows committed in the header. An append
+        that crashed before its header write leaves bytes past that point;
+        without this the next append would land after them and every later
+        offset would point into garbage.
+        """
+        itemsize = np.dtype(self._np_dtype).itemsize
+        sizes = {
+            self._vectors_path: self.count * (self.dimensions or 0) * itemsize,
+            self._offsets_path: self.count * np.dtype(np.int64).itemsize,
+            self._records_path: self._records_bytes,
+        }
+        for path, size in sizes.items():
+            if path.exists() and path.stat().st_size > size:
+                os.truncate(path, size)
+
+    def _committed_records_size(self) -> int:
+        if self.count == 0:
+            return 0
+        last = np.fromfile(self._offsets_path, dtype=np.int64, count=self.count)[-1]
+        with open(self._records_path, "rb") as records:
+            records.seek(int(last))
+            return int(last) + len(records.readline())
+
+    def _remap(self) -> None:
+        if self.count == 0:
+            self._vectors = np.empty((0, self.dimensions or 0), dtype=self._np_dtype)
+            self._offsets = np.empty((0,), dtype=np.int64)
+            return
+        self._vectors = np.memmap(self._vectors_path, dtype=self._np_dtype, mode="r",
+                                  shape=(self.count, self.dimensions))
+        self._offsets = np.memmap(self._offsets_path, dtype=np.int64, mode="r", shape=(self.count,))
+
+    def storage_version(self) -> str:
+        """Committed row count and header write time on disk - changes when any process appends"""
+        if not self._header_path.exists():
+            return "0"
+        header = json.loads(self._header_path.read_text())
+        return f"{header['count']}:{self._header_path.stat().st_mtime_ns}"
+
+    def _write_header(self) -> None:
+        header = {"dimensions": self.dimensions, "dtype": self.dtype, "count": self.count,
+                  "records_bytes": self._records_bytes}
+        tmp = self.path / "index.json.tmp"
+        tmp.write_text(json.dumps(header))
+        os.replace(tmp, self._header_path)
+        self._header_stamp = _stamp(self._header_path)
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in documents])
+        return self.add_embeddings(documents, vectors, ids)
+
+    def add_embeddings(self, documents: List[Document], vectors: Sequence[Sequence[float]],
+                       ids: Optional[List[str]] = None) -> List[str]:
+        """Append documents with precomputed embeddings"""
+        if not documents:
+            return []
+        ids = ids or [str(uuid.uuid4()) for _ in documents]
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+
+        with self._locked():
+            # Append after the rows other processes committed, and drop what a
+            # crashed writer left behind, before computing any offset
+            self._refresh()
+            self._truncate_uncommitted()
+            if self.dimensions is None:
+                self.dimensions = matrix.shape[1]
+            elif matrix.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dimensional embeddings, got {matrix.shape[1]}")
+
+            # Append-only files: records first, then offsets, vectors and finally the
+            # header. Rows only count once the header says so - a crash mid-write
+            # leaves trailing bytes that the next writer truncates (_truncate_uncommitted)
+            offsets = []
+            with open(self._records_path, "ab") as records:
+                position = self._records_bytes
+                for doc_id, doc in zip(ids, documents):
+                    line = json.dumps({"id": doc_id, "page_content": doc.page_content,
+                                       "metadata": doc.metadata}).encode("utf-8") + b"\n"
+                    offsets.append(position)
+                    records.write(line)
+                    position += len(line)
+            with open(self._offsets_path, "ab") as handle:
+                handle.write(np.asarray(offsets, dtype=np.int64).tobytes())
+            with open(self._vectors_path, "ab") as handle:
+                handle.write(matrix.astype(self._np_dtype).tobytes())
+
+            # Rows another process added are read from disk when the metadata index next catches up
+            metadata_current = self._metadata is not None and self._metadata.count == self.count
+            self.count += len(documents)
+            self._records_bytes = position
+            self._write_header()
+            self._remap()
+            if metadata_current:
+                self._metadata.extend([doc.metadata for doc in documents])
+
+            if self._centroids is not None:
+                self._assignments = np.concatenate([self._assignments, self._assign(matrix)])
+                self._save_ivf()
+        return ids
+
+    def build_ivf(self, n_lists: Optional[int] = None, iterations: int = 10, sample_size: int = 100000,
+                  seed: int = 0) -> None:
+        """
+        Partition rows into `n_lists` clusters (spherical k-means) so searches
+        only score the clusters nearest to the query.
+
+        Args:
+            n_lists: Number of clusters (default sqrt(rows))
+            iterations: k-means iterations
+            sample_size: Rows used to train the centroids
+            seed: RNG seed, for reproducible partitions
+        """
+        with self._locked():
+            self._refresh()
+            self._build_ivf(n_lists, iterations, sample_size, seed)
+
+    def _build_ivf(self, n_lists: Optional[int], iterations: int, sample_size: int, seed: int) -> None:
+        if self.count == 0:
+            return
+        n_lists = n_lists or max(1, int(np.sqrt(self.count)))
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(self.count, size=min(sample_size, self.count), replace=False))
+        sample = np.asarray(self._vectors[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(len(sample), size=min(n_lists, len(sample)), replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(len(centroids)):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        self._centroids = centroids
+        self._assignments = np.concatenate([
+            self._assign(np.asarray(self._vectors[start:start + self.search_block_size], dtype=np.float32))
+            for start in range(0, self.count, self.search_block_size)
+        ])
+        self._save_ivf()
+
+    def _assign(self, matrix: np.ndarray) -> np.ndarray:
+        return np.argmax(matrix @ self._centroids.T, axis=1).astype(np.int32)
+
+    def matching_rows(self, filter: Union[SearchFilter, Callable[[dict], bool]]) -> np.ndarray:
+        """
+        Rows whose metadata satisfies `filter`, for pre-filtered search.
+
+        A SearchFilter is answered from the in-memory metadata columns. Any
+        other predicate is called on every row's metadata, read from disk.
+        """
+        self._refresh()
+        if isinstance(filter, SearchFilter):
+            return self._metadata_index().select(filter)
+        return np.asarray([row for row, metadata in enumerate(self._read_metadata(0, self.count))
+                           if filter(metadata)], dtype=np.int64)
+
+    def _metadata_index(self) -> _MetadataIndex:
+        if self._metadata is None:
+            self._metadata = _MetadataIndex()
+        if self._metadata.count < self.count:
+            self._metadata.extend(self._read_metadata(self._metadata.count, self.count))
+        return self._metadata
+
+    def _read_metadata(self, start: int, end: int) -> List[dict]:
+        """Metadata of rows [start, end) - consecutive rows are consecutive lines"""
+        if start >= end:
+            return []
+        with open(self._records_path, "rb") as records:
+            records.seek(int(self._offsets[start]))
+            return [json.loads(records.readline())["metadata"] for _ in range(start, end)]
+
+    def search_vectors(self, queries: Sequence[Sequence[float]], k: int = 4, n_probe: int = 8,
+                       rows: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Batched cosine top-k.
+
+        Args:
+            queries: One or more query embeddings
+            k: Results per query
+            n_probe: IVF clusters scanned per query (ignored without IVF)
+            rows: Only score these rows (see matching_rows) - an exact search
+                over the subset, so a filter never leaves fewer than k hits
+
+        Returns:
+            Per query, a list of (row, cosine similarity), best first
+        """
+        self._refresh()
+        query_matrix = _normalize(np.asarray(queries, dtype=np.float32))
+        if self.count == 0 or (rows is not None and len(rows) == 0):
+            return [[] for _ in range(len(query_matrix))]
+        if rows is not None:
+            return self._search_rows(query_matrix, k, rows)
+        if self._centroids is not None:
+            return [self._search_ivf(query, k, n_probe) for query in query_matrix]
+
+        # Exact search: score block by block, keep a running top-k per query
+        best_rows = np.empty((len(query_matrix), 0), dtype=np.int64)
+        best_scores = np.empty((len(query_matrix), 0), dtype=np.float32)
+        for start in range(0, self.count, self.search_block_size):
+            block = np.asarray(self._vectors[start:start + self.search_block_size], dtype=np.float32)
+            scores = query_matrix @ block.T
+            rows = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            keep = _top_k(best_scores, k)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        return [
+            [(int(row), float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
+
+    def _search_rows(self, query_matrix: np.ndarray, k: int, rows: np.ndarray) -> List[List[Tuple[int, float]]]:
+        results = [[] for _ in range(len(query_matrix))]
+        for start in range(0, len(rows), self.search_block_size):
+            block_rows = rows[start:start + self.search_block_size]
+            scores = query_matrix @ np.asarray(self._vectors[block_rows], dtype=np.float32).T
+            for hits, query_scores in zip(results, scores):
+                hits.extend((int(block_rows[i]), float(query_scores[i])) for i in _top_k(query_scores, k))
+        return [sorted(hits, key=lambda hit: -hit[1])[:k] for hits in results]
+
+    def _search_ivf(self, query: np.ndarray, k: int, n_probe: int) -> List[Tuple[int, float]]:
+        probe = _top_k(self._centroids @ query, n_probe)
+        candidates = np.flatnonzero(np.isin(self._assignments, probe))
+        if len(candidates) == 0:
+            return []
+        scores = np.asarray(self._vectors[candidates], dtype=np.float32) @ query
+        keep = _top_k(scores, k)
+        return [(int(candidates[i]), float(scores[i])) for i in keep]
+
+    def get_documents(self, rows: Sequence[int]) -> List[Document]:
+        """Read the stored records for the given rows"""
+        documents = []
+        with open(self._records_path, "rb") as records:
+            for row in rows:
+                records.seek(int(self._offsets[row]))
+                record = json.loads(records.readline())
+                metadata = dict(record["metadata"])
+                metadata.setdefault("id", record["id"])
+                documents.append(Document(page_content=record["page_content"], metadata=metadata))
+        return documents
+
+    def get_vectors(self, rows: Sequence[int]) -> np.ndarray:
+        return np.asarray(self._vectors[list(rows)], dtype=np.float32)
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Union[SearchFilter, Callable[[dict], bool]]] = None
+                                               ) -> List[Tuple[Document, float]]:
+        rows = self.matching_rows(filter) if filter is not None else None
+        hits = self.search_vectors([embedding], k, rows=rows)[0]
+        documents = self.get_documents([row for row, _ in hits])
+        return list(zip(documents, [score for _, score in hits]))
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Optional[Union[SearchFilter, Callable[[dict], bool]]] = None,
+                                    **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[Union[SearchFilter, Callable[[dict], bool]]] = None
+                                     ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4,
+                          filter: Optional[Union[SearchFilter, Callable[[dict], bool]]] = None,
+                          **kwargs) -> List[Document]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k, filter)
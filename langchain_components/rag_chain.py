@@ -1,17 +1,77 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Union
+
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from dotenv import load_dotenv
 
-from .vector_store  import VectorStorageManager
+from .vector_store  import RETRIEVAL_SOURCES, VectorStorageManager
+from .answer_cache import SemanticAnswerCache
+from .context_builder import ContextBuilder
+from .filters import SearchFilter
+from .instrumentation import count, enabled, observe, span
+from .tokens import count_tokens
+
+
+@dataclass
+class QueryTiming:
+    """
+        Latency breakdown of one RAGChain.aquery / astream call, in seconds.
+
+        Attributes:
+            retrieval: Time spent embedding the question and searching
+            time_to_first_token: From the start of the call to the first
+                streamed token (None if nothing was generated)
+            total: From the start of the call to the last token
+    """
+    retrieval: float = 0.0
+    time_to_first_token: Optional[float] = None
+    total: float = 0.0
+
+
+@dataclass
+class BatchAnswer:
+    """
+        One item of RAGChain.query_batch.
+
+        Attributes:
+            question: The question asked
+            answer: Generated answer, None if this item failed
+            error: What went wrong for this item, None on success
+    """
+    question: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
 
 
 class RAGChain:
+    """
+        Args:
+            vector_store: Store to retrieve from
+            answer_cache: Optional semantic cache of previous answers
+            context_builder: Optional dedup / MMR / token-budget context packing
+            retrieval: "collection" reads the chunks stored with
+                vector_store.add_documents; "chunks" and "hybrid" read the
+                document_chunks table filled by the ingest CLI (vector k-NN,
+                or lexical + vector fusion)
+    """
     load_dotenv()
 
-    def __init__(self, vector_store: VectorStorageManager):
+    def __init__(self, vector_store: VectorStorageManager, answer_cache: Optional[SemanticAnswerCache] = None,
+                 context_builder: Optional[ContextBuilder] = None, retrieval: str = "collection"):
+        if retrieval not in RETRIEVAL_SOURCES:
+            raise ValueError(f"Unknown retrieval source: {retrieval}")
         self.vector_store = vector_store
+        self.retrieval = retrieval
+        # Optional: answers similar questions without retrieval or an LLM call
+        self.answer_cache = answer_cache
+        # Optional: dedup, MMR and token-budgeted packing instead of joining top-k as-is
+        self.context_builder = context_builder
         self.llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
 
         self.prompt = ChatPromptTemplate.from_template(                                                                       
@@ -24,31 +84,276 @@ class RAGChain:
             Answer:"""                                                                                                                    
         )
 
-    def query(self, question: str, k: int = 4) -> str:                                                                            
+        # Built once and reused by every call
+        self.chain = self.prompt | self.llm | StrOutputParser()
+        self.last_timing: Optional[QueryTiming] = None
+
+    def query(self, question: str, k: int = 4, filter: Optional[SearchFilter] = None) -> str:
         """                                                                                                                       
             Ask a question and get an answer based on your documents.                                                                 
                                                                                                                                     
             Args:                                                                                                                     
                 question: The question to ask                                                                                         
                 k: Number of documents to retrieve for context                                                                        
+                filter: Only answer from matching chunks (documents, file
+                    types, upload dates, metadata such as a tenant)
                                                                                                                                     
             Returns:                                                                                                                  
                 Answer string generated by the LLM                                                                                    
         """                                                                                                               
-        # Step 1: Retrieve relevant documents                                                                                     
-        docs = self.vector_store.similarity_search(question, k=k)                                                                 
-                                                                                                                   
-        # Step 2: Format documents into a single context string                                                                   
-        context = "\n\n".join([doc.page_content for doc in docs])                                                                 
-                                                                                                  
-        # Step 3: Build and run the chain                                                                                         
-        chain = self.prompt | self.llm | StrOutputParser()                                                                        
-                                                                                                                                
-        # Step 4: Invoke with our context and question                                                                            
-        answer = chain.invoke({                                                                                                   
-            "context": context,                                                                                                   
-            "question": question                                                                                                  
-        })                                                                                                                        
-                                                                                                                                
-        return answer                                                                                                             
-                                                                                                                                                                  
\ No newline at end of file
+        # Step 0: Answer from the semantic cache if a similar question was seen
+        use_cache = self._use_answer_cache(filter)
+        embedding = None
+        if use_cache:
+            scope = self._cache_scope()
+            embedding = self.vector_store.embeddings.embed_query(question)
+            cached = self.answer_cache.lookup(*scope, embedding)
+            if cached is not None:
+                count("answer_cache_hits")
+                return cached
+
+        # Step 1 + 2: Retrieve relevant documents and format them into a context string
+        with span("rag_retrieval"):
+            context = self._retrieve_context(question, k, embedding, filter)
+
+        # Step 3: Invoke the prebuilt chain with our context and question
+        with span("rag_generation"):
+            answer = self.chain.invoke({                                                                                                   
+                "context": context,                                                                                                   
+                "question": question                                                                                                  
+            })                                                                                                                        
+        self._count_llm_tokens(context, question, answer)
+
+        if use_cache:
+            self.answer_cache.store(*scope, question, embedding, answer)
+        return answer
+
+    async def astream(self, question: str, k: int = 4, timing: Optional[QueryTiming] = None,
+                      filter: Optional[SearchFilter] = None) -> AsyncIterator[str]:
+        """
+            Stream the answer token by token without blocking the event loop.
+
+            Retrieval runs on a worker thread; generation streams from the LLM
+            as tokens arrive, so a chat UI can render the answer after
+            retrieval + first-token latency instead of the full generation.
+
+            Args:
+                question: The question to ask
+                k: Number of documents to retrieve for context
+                timing: Optional QueryTiming to fill in (also kept as self.last_timing)
+                filter: Optional SearchFilter (see query)
+
+            Yields:
+                Answer text chunks
+        """
+        timing = timing if timing is not None else QueryTiming()
+        self.last_timing = timing
+        started = time.perf_counter()
+
+        use_cache = self._use_answer_cache(filter)
+        if use_cache:
+            scope = await asyncio.to_thread(self._cache_scope)
+            embedding = await self.vector_store.embeddings.aembed_query(question)
+            cached = self.answer_cache.lookup(*scope, embedding)
+            if cached is not None:
+                timing.time_to_first_token = timing.total = time.perf_counter() - started
+                count("answer_cache_hits")
+                yield cached
+                return
+        else:
+            embedding = None
+        context = await asyncio.to_thread(self._retrieve_context, question, k, embedding, filter)
+        timing.retrieval = time.perf_counter() - started
+
+        parts = []
+        try:
+            async for token in self.chain.astream({
+                "context": context,
+                "question": question
+            }):
+                if timing.time_to_first_token is None:
+                    timing.time_to_first_token = time.perf_counter() - started
+                parts.append(token)
+                yield token
+        finally:
+            timing.total = time.perf_counter() - started
+            self._observe_timing(timing)
+
+        answer = "".join(parts)
+        self._count_llm_tokens(context, question, answer)
+        if use_cache:
+            self.answer_cache.store(*scope, question, embedding, answer)
+
+    async def aquery(self, question: str, k: int = 4, timing: Optional[QueryTiming] = None,
+                     filter: Optional[SearchFilter] = None) -> str:
+        """
+            Async version of query - same answer, without blocking the event loop.
+
+            Args:
+                question: The question to ask
+                k: Number of documents to retrieve for context
+                timing: Optional QueryTiming to fill in (also kept as self.last_timing)
+                filter: Optional SearchFilter (see query)
+
+            Returns:
+                Answer string generated by the LLM
+        """
+        parts = []
+        async for token in self.astream(question, k=k, timing=timing, filter=filter):
+            parts.append(token)
+        return "".join(parts)
+
+    def query_batch(self, questions: List[str], k: int = 4, max_concurrency: int = 8,
+                    filter: Optional[SearchFilter] = None) -> List[BatchAnswer]:
+        """
+            Answer many questions at once.
+
+            Retrieval is batched (one embedding call, one multi-query k-NN
+            statement) and LLM generations run concurrently, at most
+            max_concurrency at a time. With a ContextBuilder (or hybrid
+            retrieval) each question's candidates are fetched concurrently
+            through the same path as query(), so a batch answer is built from
+            the same context as a single one. Like query(), questions are
+            answered from the answer cache when it holds a similar one, and
+            fresh answers are stored in it.
+
+            Args:
+                questions: Questions to answer
+                k: Number of documents to retrieve per question
+                max_concurrency: Max LLM calls in flight
+                filter: Optional SearchFilter, applied to every question (see query)
+
+            Returns:
+                One BatchAnswer per question, in input order. A failed item
+                carries its error instead of failing the whole batch.
+        """
+        if not questions:
+            return []
+
+        results: List[Optional[BatchAnswer]] = [None] * len(questions)
+        use_cache = self._use_answer_cache(filter)
+        embeddings = None
+        if use_cache:
+            try:
+                scope = self._cache_scope()
+                embeddings = self.vector_store.embeddings.embed_documents(questions)
+            except Exception as error:
+                # One embedding call serves every question
+                return [BatchAnswer(question=question, error=f"retrieval failed: {error}") for question in questions]
+            for i, (question, embedding) in enumerate(zip(questions, embeddings)):
+                cached = self.answer_cache.lookup(*scope, embedding)
+                if cached is not None:
+                    count("answer_cache_hits")
+                    results[i] = BatchAnswer(question=question, answer=cached)
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        with span("rag_retrieval_batch"):
+            contexts = self._retrieve_batch([questions[i] for i in pending], k, max_concurrency, filter,
+                                            [embeddings[i] for i in pending] if embeddings is not None else None)
+
+        inputs = []
+        for i, context in zip(pending, contexts):
+            if isinstance(context, Exception):
+                count("rag_retrieval_errors")
+                results[i] = BatchAnswer(question=questions[i], error=f"retrieval failed: {context}")
+            else:
+                inputs.append((i, {"context": context, "question": questions[i]}))
+
+        with span("rag_generation_batch"):
+            outputs = self.chain.batch([item for _, item in inputs], config={"max_concurrency": max_concurrency},
+                                       return_exceptions=True) if inputs else []
+
+        for (i, item), output in zip(inputs, outputs):
+            if isinstance(output, Exception):
+                count("rag_generation_errors")
+                results[i] = BatchAnswer(question=item["question"], error=f"generation failed: {output}")
+            else:
+                self._count_llm_tokens(item["context"], item["question"], output)
+                results[i] = BatchAnswer(question=item["question"], answer=output)
+                if use_cache:
+                    self.answer_cache.store(*scope, item["question"], embeddings[i], output)
+        return results
+
+    def _count_llm_tokens(self, context: str, question: str, answer: str) -> None:
+        """Prompt/completion token counters - tokenizing costs real time, so only with metrics on"""
+        if not enabled():
+            return
+        model = self.llm.model_name
+        count("llm_prompt_tokens", count_tokens(self.prompt.format(context=context, question=question), model),
+              model=model)
+        count("llm_completion_tokens", count_tokens(answer, model), model=model)
+
+    @staticmethod
+    def _observe_timing(timing: QueryTiming) -> None:
+        """Export a streamed call's QueryTiming (spans can't straddle the yields)"""
+        observe("rag_retrieval", timing.retrieval)
+        if timing.time_to_first_token is not None:
+            observe("rag_time_to_first_token", timing.time_to_first_token)
+        observe("rag_total", timing.total)
+
+    def _retrieve_batch(self, questions: List[str], k: int, max_concurrency: int,
+                        filter: Optional[SearchFilter] = None,
+                        embeddings: Optional[List[List[float]]] = None) -> List[Union[str, Exception]]:
+        """
+            Prompt context per question, built exactly as _retrieve_context
+            builds it, or the exception that question's retrieval raised. A
+            shared step (the embedding call, a single multi-query statement)
+            fails every question it serves.
+        """
+        if not questions:
+            return []
+        try:
+            if self.context_builder is None and self.retrieval == "collection":
+                if embeddings is None:
+                    embeddings = self.vector_store.embeddings.embed_documents(questions)
+                hits = self.vector_store.similarity_search_by_vectors(embeddings, k=k, filter=filter)
+                return [self._format_context(docs) for docs in hits]
+            if self.context_builder is None and self.retrieval == "chunks":
+                hits = self.vector_store.search_chunks_batch(questions, k=k, filter=filter, embeddings=embeddings)
+                return [self._format_context(docs) for docs in hits]
+            if embeddings is None:
+                embeddings = self.vector_store.embeddings.embed_documents(questions)
+        except Exception as error:
+            return [error] * len(questions)
+
+        # Dedup / MMR work on each question's own candidates and stored embeddings,
+        # and fusion ranks per query text - embed once, then retrieve per question
+        def retrieve(question: str, embedding: List[float]) -> Union[str, Exception]:
+            try:
+                return self._retrieve_context(question, k, embedding, filter)
+            except Exception as error:
+                return error
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            return list(pool.map(retrieve, questions, embeddings))
+
+    def _use_answer_cache(self, filter: Optional[SearchFilter]) -> bool:
+        """Cached answers are unfiltered - a filtered question must not reuse them"""
+        return self.answer_cache is not None and (filter is None or filter.is_empty())
+
+    def _cache_scope(self):
+        """(collection, content version) that cached answers are tied to"""
+        name = self.vector_store.collection_name if self.retrieval == "collection" else self.retrieval
+        return name, self.vector_store.content_version(self.retrieval)
+
+    def _retrieve_context(self, question: str, k: int, embedding: Optional[List[float]] = None,
+                          filter: Optional[SearchFilter] = None) -> str:
+        """Retrieve documents for a question and turn them into the prompt context"""
+        if self.context_builder is not None:
+            docs = self.context_builder.retrieve(self.vector_store, question, k, embedding=embedding, filter=filter,
+                                                 source=self.retrieval)
+            return self.context_builder.build(docs, k=k)
+
+        if self.retrieval == "chunks":
+            docs = self.vector_store.search_chunks(question, k=k, filter=filter, embedding=embedding)
+        elif self.retrieval == "hybrid":
+            docs = self.vector_store.hybrid_search(question, k=k, filter=filter, embedding=embedding)
+        elif embedding is not None:
+            docs = self.vector_store.similarity_search_by_vector(embedding, k=k, filter=filter)
+        else:
+            docs = self.vector_store.similarity_search(question, k=k, filter=filter)
+        return self._format_context(docs)
+
+    @staticmethod
+    def _format_context(docs) -> str:
+        return "\n\n".join([doc.page_content for doc in docs])
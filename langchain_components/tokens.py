@@ -0,0 +1,27 @@
+"""
+Token counting helpers
+
+Uses tiktoken (installed alongside langchain-openai) when available and falls
+back to the usual ~4 characters per token estimate otherwise.
+"""
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken ships with langchain-openai
+    tiktoken = None
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "text-embedding-3-small") -> int:
+    """Number of tokens `text` costs for `model`"""
+    if tiktoken is None:
+        return max(1, len(text) // 4)
+    return len(_encoding(model).encode(text, disallowed_special=()))
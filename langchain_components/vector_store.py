@@ -1,33 +1,114 @@
-from typing import List, Optional
-from langchain_postgres import PGVector
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
 from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from dotenv import load_dotenv
 
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .embedding_scheduler import EmbeddingScheduler
+from .filters import SearchFilter, utc_isoformat
+from .instrumentation import count, instrument_engine, span
+
+# Where RAG retrieval reads from: the PGVector/local collection written by
+# add_documents, or the document_chunks table written by the ingest CLI
+# (pure vector k-NN, or lexical + vector fusion)
+RETRIEVAL_SOURCES = ("collection", "chunks", "hybrid")
+
 
 class VectorStorageManager:
-    def __init__(self, connection_string: str, collection_name: str="documents"):
+    """
+        Store and search document chunks.
+
+        Backends:
+            pgvector: PGVector collection in Postgres (default)
+            local: memory-mapped NumPy index on disk (see local_index.py) -
+                no Postgres round-trip, works fully offline
+
+        Args:
+            connection_string: Postgres URL; defaults to the shared pooled engine
+            collection_name: Collection (pgvector) or index directory name (local)
+            embedding_cache: Cache for the default OpenAI embedder
+            backend: "pgvector" or "local" (default: VECTOR_BACKEND env var or pgvector)
+            embeddings: Custom embeddings, e.g. HashingEmbeddings for offline runs
+            index_path: Directory for the local backend
+                (default: .cache/vectors/<collection_name>)
+            local_dtype: "float32" or "float16" for a new local index
+    """
+
+    # How long content_version trusts its last read of the storage version
+    VERSION_TTL_SECONDS = 2.0
+
+    def __init__(self, connection_string: Optional[str] = None, collection_name: str="documents",
+                 embedding_cache: Optional[EmbeddingCache] = None, backend: Optional[str] = None,
+                 embeddings: Optional[Embeddings] = None, index_path: Optional[str] = None,
+                 local_dtype: str = "float32"):
         load_dotenv()
 
         self.collection_name = collection_name
         self.connection_string = connection_string
+        self.backend = backend or os.getenv("VECTOR_BACKEND", "pgvector")
+        # source -> (content version, monotonic time read); see content_version
+        self._versions = {}
+
+        if embeddings is not None:
+            self.embeddings = embeddings
+        else:
+            # Wrap the embedder so re-ingested chunks and repeated questions hit the cache,
+            # and misses are sent as scheduled, rate-limited batches
+            self.embeddings = CachedEmbeddings(
+                EmbeddingScheduler.from_env(OpenAIEmbeddings(model="text-embedding-3-small", max_retries=0)),
+                model="text-embedding-3-small",
+                cache=embedding_cache
+            )
+
+        if self.backend == "local":
+            from .local_index import LocalVectorStore
 
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+            self.connection = None
+            self.vector_store = LocalVectorStore(
+                index_path or os.path.join(".cache", "vectors", collection_name),
+                embeddings=self.embeddings,
+                dtype=local_dtype
+            )
+        elif self.backend == "pgvector":
+            from langchain_postgres import PGVector
 
-        self.vector_store = PGVector(
-            connection=self.connection_string,
-            collection_name=self.collection_name,
-            embeddings=self.embeddings,
-            use_jsonb=True
-        )
+            # Without an explicit connection string, share the pooled engine from database.connection
+            if connection_string is None:
+                from database import engine
+                self.connection = engine
+            else:
+                self.connection = connection_string
+
+            self.vector_store = PGVector(
+                connection=self.connection,
+                collection_name=self.collection_name,
+                embeddings=self.embeddings,
+                use_jsonb=True
+            )
+            # No-op unless METRICS_ENABLED: times every statement, EXPLAINs slow vector searches.
+            # The shared engine also serves the document_chunks queries (SessionLocal)
+            from database import engine as shared_engine
+            for target in (shared_engine, self._sql_engine(), getattr(self.vector_store, "_engine", None)):
+                if target is not None:
+                    instrument_engine(target)
+        else:
+            raise ValueError(f"Unknown vector store backend: {self.backend}")
     
-    def add_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List:
+    def add_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None,
+                      document_id: Optional[int] = None) -> List:
         """                                                                                                                       
             Store text chunks in the vector store.                                                                                    
                                                                                                                                         
             Args:                                                                                                                     
                 texts: List of text chunks to store                                                                                   
                 metadatas: Optional list of metadata dicts (e.g., {"source": "file.pdf", "page": 1})                                  
+                document_id: id of the documents row the chunks belong to,
+                    stamped on every chunk so SearchFilter(document_ids=...) matches them
                                                                                                                                         
             Returns:                                                                                                                  
                 List of document IDs                                                                                                  
@@ -37,19 +118,410 @@ class VectorStorageManager:
 
         for i, text in enumerate(texts):
             metadata = metadatas[i] if metadatas and i < len(metadatas) else {}
-            documents.append(Document(page_content=text, metadata=metadata))
+            documents.append(Document(page_content=text, metadata=self._stamp_metadata(metadata, document_id)))
         
-        ids = self.vector_store.add_documents(documents)
+        with span("add_documents", backend=self.backend):
+            ids = self.vector_store.add_documents(documents)
+        count("chunks_stored", len(documents), backend=self.backend)
+        self._versions.clear()
         return ids
 
-    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+    def add_document_batches(self, batches: Iterable[List[Document]], document_id: Optional[int] = None) -> int:
+        """
+            Store chunks batch by batch as they arrive, e.g. from
+            DocumentProcessor.process_file_streaming. Each batch is embedded
+            and inserted before the next one is pulled, so the first chunks
+            are searchable long before a large file finishes.
+
+            Args:
+                batches: Iterable of chunk lists
+                document_id: Stamped on every chunk (see add_documents)
+
+            Returns:
+                Number of chunks stored
+        """
+        stored = 0
+        for batch in batches:
+            batch = [Document(page_content=doc.page_content, metadata=self._stamp_metadata(doc.metadata, document_id))
+                     for doc in batch]
+            with span("add_documents", backend=self.backend):
+                self.vector_store.add_documents(batch)
+            count("chunks_stored", len(batch), backend=self.backend)
+            self._versions.clear()
+            stored += len(batch)
+        return stored
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[SearchFilter] = None) -> List[Document]:
         """                                                                                                                       
             Perform a similarity search in the vector store.                                                                          
                                                                                                                                         
             Args:                                                                                                                     
                 query: The query string to search for                                                                                 
                 k: Number of top similar documents to retrieve
+                filter: Restrict results to some documents, file types, an
+                    upload date range or metadata values (applied before the
+                    top-k, so up to k matching chunks are still returned)
+        """
+        if self._sql_filtered(filter):
+            return self.similarity_search_by_vector(self.embeddings.embed_query(query), k=k, filter=filter)
+
+        with span("similarity_search", backend=self.backend):
+            results = self.vector_store.similarity_search(query, k=k, **self._filter_kwargs(filter))
+        return results
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Optional[SearchFilter] = None) -> List[Document]:
+        """Similarity search with an already-embedded query"""
+        with span("similarity_search", backend=self.backend):
+            if self._sql_filtered(filter):
+                return self._collection_knn([embedding], k, filter)[0]
+            return self.vector_store.similarity_search_by_vector(embedding, k=k, **self._filter_kwargs(filter))
+
+    def similarity_search_with_embeddings(self, query: str, k: int = 4,
+                                          embedding: Optional[List[float]] = None,
+                                          filter: Optional[SearchFilter] = None,
+                                          source: str = "collection"):
+        """
+            Similarity search that also returns the stored embedding of each
+            hit, e.g. for MMR re-ranking without re-embedding the chunks.
+
+            Args:
+                query: The query string to search for
+                k: Number of documents to retrieve
+                embedding: Query embedding, if already computed
+                filter: Optional SearchFilter (see similarity_search)
+                source: "collection" (this store), or "chunks" / "hybrid" to
+                    search the document_chunks table filled by the ingest CLI
+
+            Returns:
+                (query embedding, list of (document, stored embedding))
+        """
+        if source not in RETRIEVAL_SOURCES:
+            raise ValueError(f"Unknown retrieval source: {source}")
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+
+        if source != "collection":
+            if self.backend != "pgvector":
+                raise NotImplementedError("document_chunks lives in Postgres - use the pgvector backend")
+            mode = "vector" if source == "chunks" else "hybrid"
+            key = "distance" if source == "chunks" else "score"
+            return embedding, [
+                (self._chunk_to_document(chunk, value, key), [float(x) for x in chunk.embedding])
+                for chunk, value in self._query_chunks(query, embedding, k, mode, filter=filter)
+            ]
+
+        if self.backend == "local":
+            rows = self._local_rows(filter)
+            with span("similarity_search", backend=self.backend):
+                hits = self.vector_store.search_vectors([embedding], k, rows=rows)[0]
+            rows = [row for row, _ in hits]
+            documents = self.vector_store.get_documents(rows)
+            return embedding, list(zip(documents, self.vector_store.get_vectors(rows).tolist()))
+
+        import json
+        from sqlalchemy import text
+        from database.search import collection_filter_sql, vector_literal
+
+        condition, params = collection_filter_sql(filter)
+        with span("similarity_search", backend=self.backend), self._sql_engine().connect() as conn:
+            rows = conn.execute(text("""
+                SELECT e.document, e.cmetadata, e.embedding::text AS embedding
+                FROM langchain_pg_embedding e
+                JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+                WHERE c.name = :collection AND """ + condition + """
+                ORDER BY e.embedding <=> CAST(:query AS vector)
+                LIMIT :k
+            """), {"collection": self.collection_name, "query": vector_literal(embedding), "k": k, **params}).all()
+
+        return embedding, [
+            (Document(page_content=row.document, metadata=row.cmetadata or {}), json.loads(row.embedding))
+            for row in rows
+        ]
+
+    async def asimilarity_search(self, query: str, k: int = 4,
+                                 filter: Optional[SearchFilter] = None) -> List[Document]:
+        """
+            Async similarity_search. The embedding call and the DB query run
+            on a worker thread (using the pooled engine), so the event loop
+            stays free while they are in flight.
+        """
+        return await asyncio.to_thread(self.similarity_search, query, k, filter)
+
+    def similarity_search_batch(self, queries: List[str], k: int = 4,
+                                filter: Optional[SearchFilter] = None) -> List[List[Document]]:
+        """
+            Similarity search for many queries at once.
+
+            All queries are embedded in one batched call. The pgvector backend
+            then runs every k-NN lookup in a single SQL statement (one LATERAL
+            top-k per query); the local backend scores all queries in one
+            matrix product.
+
+            Args:
+                queries: Query strings
+                k: Number of documents per query
+                filter: Optional SearchFilter, applied to every query (see similarity_search)
+
+            Returns:
+                One list of documents per query, in input order
+        """
+        if not queries:
+            return []
+        embeddings = self.embeddings.embed_documents(queries)
+        return self.similarity_search_by_vectors(embeddings, k=k, filter=filter)
+
+    def similarity_search_by_vectors(self, embeddings: List[List[float]], k: int = 4,
+                                     filter: Optional[SearchFilter] = None) -> List[List[Document]]:
+        """Batched k-NN for already-embedded queries (see similarity_search_batch)"""
+        if self.backend == "local":
+            rows = self._local_rows(filter)
+            with span("similarity_search_batch", backend=self.backend):
+                hits = self.vector_store.search_vectors(embeddings, k, rows=rows)
+            return [self.vector_store.get_documents([row for row, _ in query_hits]) for query_hits in hits]
+
+        with span("similarity_search_batch", backend=self.backend):
+            return self._collection_knn(embeddings, k, filter)
+
+    def _collection_knn(self, embeddings: List[List[float]], k: int,
+                        filter: Optional[SearchFilter] = None) -> List[List[Document]]:
+        """
+            k-NN over the PGVector collection in one statement (one LATERAL
+            top-k per query). Filters go through collection_filter_sql's @>
+            containment, which the jsonb_path_ops GIN index on cmetadata
+            serves - PGVector's own filter= compiles to jsonb_path_match and
+            ->> comparisons that it cannot.
         """
+        from sqlalchemy import text
+        from database.search import collection_filter_sql, vector_literal
 
-        results = self.vector_store.similarity_search(query, k=k)
+        condition, params = collection_filter_sql(filter)
+        with self._sql_engine().connect() as conn:
+            rows = conn.execute(text("""
+                WITH queries AS (
+                    SELECT ord, CAST(vec AS vector) AS embedding
+                    FROM unnest(CAST(:vectors AS text[])) WITH ORDINALITY AS q(vec, ord)
+                )
+                SELECT queries.ord, hit.document, hit.cmetadata
+                FROM queries
+                CROSS JOIN LATERAL (
+                    SELECT e.document, e.cmetadata, e.embedding <=> queries.embedding AS distance
+                    FROM langchain_pg_embedding e
+                    JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+                    WHERE c.name = :collection AND """ + condition + """
+                    ORDER BY e.embedding <=> queries.embedding
+                    LIMIT :k
+                ) hit
+                ORDER BY queries.ord, hit.distance
+            """), {
+                "vectors": [vector_literal(e) for e in embeddings],
+                "collection": self.collection_name,
+                "k": k,
+                **params,
+            }).all()
+
+        results: List[List[Document]] = [[] for _ in embeddings]
+        for row in rows:
+            results[row.ord - 1].append(Document(page_content=row.document, metadata=row.cmetadata or {}))
         return results
+
+    def _sql_engine(self):
+        """SQLAlchemy engine behind the pgvector backend, for hand-written queries"""
+        if not isinstance(self.connection, str):
+            return self.connection
+        if getattr(self, "_owned_engine", None) is None:
+            from sqlalchemy import create_engine
+            self._owned_engine = create_engine(self.connection, pool_pre_ping=True)
+        return self._owned_engine
+
+    def content_version(self, source: str = "collection") -> str:
+        """
+            Version of the stored content that answer caches key on.
+
+            Read from storage, not counted in memory, so writes by other
+            managers and processes (a second worker, the ingest CLI) change it
+            too: row count plus newest upload stamp of the collection, row
+            count plus highest id of document_chunks, or the header of the
+            local index. The value is re-read at most every
+            VERSION_TTL_SECONDS - writes elsewhere can take that long to
+            invalidate cached answers; writes through this manager do so
+            immediately.
+
+            Args:
+                source: "collection", or "chunks" / "hybrid" for document_chunks
+        """
+        now = time.monotonic()
+        cached = self._versions.get(source)
+        if cached is not None and now - cached[1] < self.VERSION_TTL_SECONDS:
+            return cached[0]
+        version = self._read_content_version(source)
+        self._versions[source] = (version, now)
+        return version
+
+    def _read_content_version(self, source: str) -> str:
+        if source == "collection" and self.backend == "local":
+            return self.vector_store.storage_version()
+
+        from sqlalchemy import text
+
+        if source == "collection":
+            # uploaded_at is stamped on every write and fixed-width UTC, so max() is the latest write
+            statement = """
+                SELECT count(*) AS rows, max(e.cmetadata ->> 'uploaded_at') AS latest
+                FROM langchain_pg_embedding e
+                JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+                WHERE c.name = :collection
+            """
+        else:
+            # Re-ingested chunks are deleted and re-inserted, so they always get new ids
+            statement = "SELECT count(*) AS rows, max(id) AS latest FROM document_chunks"
+        with self._sql_engine().connect() as conn:
+            row = conn.execute(text(statement), {"collection": self.collection_name}).one()
+        return f"{row.rows}:{row.latest}"
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters for the embedding cache"""
+        cache = getattr(self.embeddings, "cache", None)
+        return cache.stats() if cache is not None else {}
+
+    def search_chunks(self, query: str, k: int = 4, profile: str = "balanced",
+                      filter: Optional[SearchFilter] = None,
+                      embedding: Optional[List[float]] = None) -> List[Document]:
+        """
+            Search the document_chunks table (filled by the ingest CLI)
+            through its tuned ANN index.
+
+            Args:
+                query: The query string to search for
+                k: Number of chunks to return
+                profile: "fast", "balanced" or "accurate" - sets ivfflat.probes
+                    or hnsw.ef_search for this query (see database.indexes)
+                filter: Optional SearchFilter - the index is scanned
+                    iteratively until k chunks pass it
+                embedding: Query embedding, if already computed
+        """
+        if self.backend != "pgvector":
+            raise NotImplementedError("search_chunks queries Postgres - use similarity_search with the local backend")
+
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+        results = self._query_chunks(query, embedding, k, "vector", profile=profile, filter=filter)
+        return [self._chunk_to_document(chunk, distance) for chunk, distance in results]
+
+    def search_chunks_batch(self, queries: List[str], k: int = 4, profile: str = "balanced",
+                            filter: Optional[SearchFilter] = None,
+                            embeddings: Optional[List[List[float]]] = None) -> List[List[Document]]:
+        """
+            Batched search_chunks: one embedding call and one SQL statement
+            for all queries. `embeddings` skips the embedding call when the
+            queries are already embedded.
+
+            Returns:
+                One list of chunks per query, in input order
+        """
+        if self.backend != "pgvector":
+            raise NotImplementedError("search_chunks_batch queries Postgres - use similarity_search_batch with the local backend")
+        if not queries:
+            return []
+
+        from database import SessionLocal
+        from database.search import search_chunks_batch
+
+        if embeddings is None:
+            embeddings = self.embeddings.embed_documents(queries)
+        db = SessionLocal()
+        try:
+            with span("search_chunks_batch", profile=profile):
+                results = search_chunks_batch(db, embeddings, k=k, profile=profile, filters=filter)
+            return [[self._chunk_to_document(chunk, distance) for chunk, distance in hits] for hits in results]
+        finally:
+            db.close()
+
+    def hybrid_search(self, query: str, k: int = 4, mode: str = "hybrid", candidates: int = 50,
+                      profile: str = "balanced", filter: Optional[SearchFilter] = None,
+                      embedding: Optional[List[float]] = None) -> List[Document]:
+        """
+            Full-text + vector search over document_chunks, fused with
+            reciprocal rank fusion in a single SQL round-trip.
+
+            Catches exact identifiers (part numbers, error codes, names)
+            that cosine search alone misses.
+
+            Args:
+                query: The query string (websearch syntax: "quoted phrase", OR, -term)
+                k: Number of chunks to return
+                mode: "hybrid", or "lexical" to skip the embedding call entirely
+                candidates: Candidates taken from each ranking before fusion
+                profile: Search profile for the vector side
+                filter: Optional SearchFilter, applied to both rankings
+                embedding: Query embedding, if already computed (hybrid mode)
+        """
+        if self.backend != "pgvector":
+            raise NotImplementedError("hybrid_search queries Postgres - use similarity_search with the local backend")
+        if mode not in ("hybrid", "lexical"):
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        if mode == "lexical":
+            embedding = None
+        elif embedding is None:
+            embedding = self.embeddings.embed_query(query)
+        results = self._query_chunks(query, embedding, k, mode, candidates=candidates, profile=profile,
+                                     filter=filter)
+        return [self._chunk_to_document(chunk, score, "score") for chunk, score in results]
+
+    def _query_chunks(self, query: str, embedding: Optional[List[float]], k: int, mode: str,
+                      candidates: int = 50, profile: str = "balanced", filter: Optional[SearchFilter] = None):
+        """(chunk, distance or score) hits from document_chunks; mode is vector, hybrid or lexical"""
+        from database import SessionLocal
+        from database.search import hybrid_search_chunks, search_chunks
+
+        db = SessionLocal()
+        try:
+            if mode == "vector":
+                with span("search_chunks", profile=profile):
+                    return search_chunks(db, embedding, k=k, profile=profile, filters=filter)
+            with span("hybrid_search", mode=mode):
+                return hybrid_search_chunks(db, query, embedding, k=k, candidates=max(candidates, k),
+                                            profile=profile, filters=filter)
+        finally:
+            db.close()
+
+    def _sql_filtered(self, filter: Optional[SearchFilter]) -> bool:
+        """A filtered pgvector query, answered by _collection_knn instead of PGVector"""
+        return self.backend == "pgvector" and filter is not None and not filter.is_empty()
+
+    def _filter_kwargs(self, filter: Optional[SearchFilter]) -> dict:
+        """Translate a SearchFilter for the local index's filter argument"""
+        if filter is None or filter.is_empty():
+            return {}
+        return {"filter": filter}
+
+    def _local_rows(self, filter: Optional[SearchFilter]):
+        """Rows of the local index a filter leaves (None: search everything)"""
+        if filter is None or filter.is_empty():
+            return None
+        return self.vector_store.matching_rows(filter)
+
+    @staticmethod
+    def _stamp_metadata(metadata: dict, document_id: Optional[int] = None) -> dict:
+        """Add the fields SearchFilter reads: document_id (an int), file_type (from the source path) and uploaded_at"""
+        metadata = dict(metadata or {})
+        if document_id is not None:
+            metadata["document_id"] = document_id
+        if metadata.get("document_id") is not None:
+            metadata["document_id"] = int(metadata["document_id"])
+        source = metadata.get("source")
+        if source and "file_type" not in metadata:
+            metadata["file_type"] = os.path.splitext(str(source))[1].lstrip(".").lower()
+        metadata.setdefault("uploaded_at", utc_isoformat(datetime.now(timezone.utc)))
+        return metadata
+
+    @staticmethod
+    def _chunk_to_document(chunk, value: float, key: str = "distance") -> Document:
+        metadata = dict(chunk.chunk_metadata or {})
+        metadata.update({
+            "document_id": chunk.document_id,
+            "chunk_index": chunk.chunk_index,
+            key: value,
+        })
+        return Document(page_content=chunk.chunk_text, metadata=metadata)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from langchain_components import answer_cache
+from langchain_components.answer_cache import SemanticAnswerCache
+
+
+def _vector(*values):
+    return list(values) + [0.0] * (4 - len(values))
+
+
+def test_similar_question_hits():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store("docs", "1", "what is rag?", _vector(1.0, 0.1), "an answer")
+    assert cache.lookup("docs", "1", _vector(2.0, 0.2)) == "an answer"  # scale does not matter
+    assert cache.lookup("docs", "1", _vector(0.0, 1.0)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_scope_isolates_collections_and_versions():
+    cache = SemanticAnswerCache()
+    cache.store("docs", "1", "q", _vector(1.0), "old")
+    assert cache.lookup("other", "1", _vector(1.0)) is None
+    assert cache.lookup("docs", "2", _vector(1.0)) is None
+
+    # Storing under a new version drops the older version's answers
+    cache.store("docs", "2", "q", _vector(1.0), "new")
+    assert cache.lookup("docs", "2", _vector(1.0)) == "new"
+    assert cache.stats()["entries"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticAnswerCache(ttl_seconds=10)
+    cache.store("docs", "1", "q", _vector(1.0), "answer")
+    now[0] += 5
+    assert cache.lookup("docs", "1", _vector(1.0)) == "answer"
+    now[0] += 6
+    assert cache.lookup("docs", "1", _vector(1.0)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.store("docs", "1", "a", _vector(1.0), "A")
+    cache.store("docs", "1", "b", _vector(0.0, 1.0), "B")
+    assert cache.lookup("docs", "1", _vector(1.0)) == "A"  # a is now most recent
+    cache.store("docs", "1", "c", _vector(0.0, 0.0, 1.0), "C")
+    assert cache.lookup("docs", "1", _vector(0.0, 1.0)) is None
+    assert cache.lookup("docs", "1", _vector(1.0)) == "A"
+    assert cache.lookup("docs", "1", _vector(0.0, 0.0, 1.0)) == "C"
+
+
+def test_invalidate():
+    cache = SemanticAnswerCache()
+    cache.store("docs", "1", "q", _vector(1.0), "x")
+    cache.store("other", "1", "q", _vector(1.0), "y")
+    cache.invalidate("docs")
+    assert cache.lookup("docs", "1", _vector(1.0)) is None
+    assert cache.lookup("other", "1", _vector(1.0)) == "y"
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
+
+
+def test_zero_vector_does_not_crash():
+    cache = SemanticAnswerCache()
+    cache.store("docs", "1", "q", _vector(1.0), "x")
+    assert cache.lookup("docs", "1", np.zeros(4).tolist()) is None
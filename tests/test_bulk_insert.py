@@ -0,0 +1,94 @@
+import json
+import struct
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg2")  # database/__init__ creates the engine
+
+from database import bulk_insert
+from database.bulk_insert import COPY_COLUMNS, BulkChunkWriter, ChunkRow, encode_row, encode_vector
+from database.indexes import IndexConfig
+
+
+def _read_fields(data: bytes):
+    """Decode one binary COPY tuple into raw field payloads (None for NULL)"""
+    (count,) = struct.unpack_from(">h", data)
+    offset, fields = 2, []
+    for _ in range(count):
+        (length,) = struct.unpack_from(">i", data, offset)
+        offset += 4
+        if length == -1:
+            fields.append(None)
+            continue
+        fields.append(data[offset:offset + length])
+        offset += length
+    assert offset == len(data)
+    return fields
+
+
+def test_encode_vector():
+    encoded = encode_vector([1.0, -2.5, 0.25])
+    assert encoded[:4] == struct.pack(">hh", 3, 0)
+    assert struct.unpack(">3f", encoded[4:]) == (1.0, -2.5, 0.25)
+
+
+def test_encode_row_fields():
+    row = ChunkRow(7, "héllo", 3, [0.5, 1.5], {"page": 2}, "abc")
+    fields = _read_fields(encode_row(row))
+    assert len(fields) == len(COPY_COLUMNS)
+    assert struct.unpack(">i", fields[0]) == (7,)
+    assert fields[1].decode("utf-8") == "héllo"
+    assert struct.unpack(">i", fields[2]) == (3,)
+    assert fields[3] == encode_vector([0.5, 1.5])
+    assert json.loads(fields[4]) == {"page": 2}
+    assert fields[5] == b"abc"
+
+
+def test_encode_row_nulls_and_jsonb():
+    fields = _read_fields(encode_row(ChunkRow(1, "t", 0, None), jsonb=True))
+    assert fields[3] is None
+    assert fields[4][:1] == b"\x01" and json.loads(fields[4][1:]) == {}
+    assert fields[5] is None
+
+
+class _Connection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, *args):
+        pass
+
+    commit = rollback = close = lambda self: None
+
+
+class _Engine:
+    def connect(self):
+        return _Connection()
+
+    def raw_connection(self):
+        return _Connection()
+
+
+def _failing_copy(raw, rows, batch_size):
+    raise RuntimeError("copy failed")
+
+
+def test_failed_load_raises_its_own_error_and_rebuilds_the_same_method(monkeypatch):
+    built = []
+
+    def build_index(**kwargs):
+        built.append(kwargs)
+        raise RuntimeError("rebuild failed")
+
+    monkeypatch.setattr(bulk_insert, "current_index",
+                        lambda conn: IndexConfig(method="ivfflat", lists=10, quantization="halfvec"))
+    monkeypatch.setattr(bulk_insert, "copy_chunk_rows", _failing_copy)
+    monkeypatch.setattr(bulk_insert, "build_index", build_index)
+
+    with pytest.raises(RuntimeError, match="copy failed"):
+        BulkChunkWriter(engine=_Engine()).write([], rebuild_index=True)
+    assert built[0]["method"] == "ivfflat" and built[0]["quantization"] == "halfvec"
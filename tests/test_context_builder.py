@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+from langchain_components import context_builder
+from langchain_components.context_builder import ContextBuilder, mmr, overlap_length
+
+
+def test_mmr_pure_relevance_is_similarity_order():
+    query = [1.0, 0.0]
+    candidates = [[0.0, 1.0], [1.0, 0.1], [1.0, 0.5]]
+    assert mmr(query, candidates, k=3, lambda_mult=1.0) == [1, 2, 0]
+
+
+def test_mmr_prefers_diverse_candidates():
+    query = [1.0, 1.0, 0.0]
+    candidates = [[1.0, 0.9, 0.0], [1.0, 0.91, 0.0], [0.2, 1.0, 0.3]]
+    assert mmr(query, candidates, k=2, lambda_mult=1.0) == [1, 0]
+    assert mmr(query, candidates, k=2, lambda_mult=0.5) == [1, 2]
+
+
+def test_mmr_edge_cases():
+    assert mmr([1.0, 0.0], [], k=3) == []
+    assert sorted(mmr([1.0, 0.0], [[1.0, 0.0], [0.0, 1.0]], k=5)) == [0, 1]
+
+
+def test_overlap_length():
+    assert overlap_length("the quick brown fox jumps", "brown fox jumps over", min_overlap=5) == 15
+    assert overlap_length("abc", "xyz", min_overlap=1) == 0
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(context_builder, "count_tokens", lambda text, model: len(text.split()))
+
+
+def test_build_drops_duplicates_and_trims_overlap(word_tokens):
+    builder = ContextBuilder(token_budget=100, min_overlap=5)
+    first = Document(page_content="alpha beta gamma delta", metadata={"source": "a.pdf"})
+    second = Document(page_content="gamma delta epsilon zeta", metadata={"source": "a.pdf"})
+    duplicate = Document(page_content="beta gamma", metadata={"source": "b.pdf"})
+    context = builder.build([first, duplicate, second])
+    assert context == "alpha beta gamma delta\n\nepsilon zeta"
+    assert builder.last_stats["selected"] == 2
+
+
+def test_build_respects_token_budget_and_k(word_tokens):
+    docs = [Document(page_content=" ".join(f"w{i}x{j}" for j in range(size)))
+            for i, size in enumerate([6, 6, 2])]
+    builder = ContextBuilder(token_budget=9, separator=" | ")
+    assert builder.build(docs) == docs[0].page_content + " | " + docs[2].page_content
+    assert builder.build(docs, k=1) == docs[0].page_content
+
+
+def test_mmr_leaves_inputs_untouched():
+    query = np.array([3.0, 4.0], dtype=np.float32)
+    candidates = np.array([[2.0, 0.0], [0.0, 5.0]], dtype=np.float32)
+    mmr(query, candidates, k=2)
+    assert query.tolist() == [3.0, 4.0]
+    assert candidates.tolist() == [[2.0, 0.0], [0.0, 5.0]]
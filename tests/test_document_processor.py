@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("langchain_community")
+pytest.importorskip("pypdf")
+pytest.importorskip("docx2txt")
+
+from benchmarks.corpus import write_docx, write_pdf, write_txt
+from langchain_core.documents import Document
+from langchain_components.document_processor import DocumentProcessor
+
+PAGES = [
+    "\n\n".join(" ".join(f"word{page}x{paragraph}x{i}" for i in range(40)) for paragraph in range(5))
+    for page in range(6)
+]
+
+
+def test_streamed_chunks_match_a_whole_document_split(monkeypatch):
+    processor = DocumentProcessor(chunk_size=300, chunk_overlap=50)
+    monkeypatch.setattr(processor, "lazy_load_document",
+                        lambda file_path: iter(Document(page_content=page, metadata={"page": number})
+                                               for number, page in enumerate(PAGES)))
+
+    expected = processor.text_splitter.split_text("\n\n".join(PAGES))
+    batches = list(processor.process_file_streaming("sample.pdf", batch_size=7))
+
+    assert len(expected) > 7
+    assert [chunk.page_content for batch in batches for chunk in batch] == expected
+    assert all(len(batch) <= 7 for batch in batches)
+    assert batches[0][0].metadata == {"page": 0} and batches[-1][-1].metadata == {"page": 5}
+
+
+PARAGRAPHS = [
+    " ".join(f"word{paragraph}x{i}" for i in range(120)) for paragraph in range(12)
+]
+
+
+@pytest.mark.parametrize("extension,writer", [("pdf", write_pdf), ("docx", write_docx), ("txt", write_txt)])
+def test_streaming_matches_process_file(tmp_path, extension, writer):
+    path = tmp_path / f"sample.{extension}"
+    writer(path, PARAGRAPHS)
+    processor = DocumentProcessor(chunk_size=300, chunk_overlap=50)
+
+    expected = processor.process_file(str(path))
+    streamed = [chunk for batch in processor.process_file_streaming(str(path), batch_size=7) for chunk in batch]
+
+    assert len(expected) > 7
+    assert [chunk.page_content for chunk in streamed] == [chunk.page_content for chunk in expected]
+    assert all(len(batch) <= 7 for batch in processor.process_file_streaming(str(path), batch_size=7))
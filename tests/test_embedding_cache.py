@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.embeddings import Embeddings
+from langchain_components import embedding_cache
+from langchain_components.embedding_cache import CachedEmbeddings, EmbeddingCache, SQLiteEmbeddingStore
+
+
+class ThirdEmbeddings(Embeddings):
+    """[1/3, len(text)] - 1/3 is not representable in float32"""
+
+    def embed_documents(self, texts):
+        return [[1 / 3, float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [1 / 3, float(len(text))]
+
+
+def test_hits_are_copies():
+    embeddings = CachedEmbeddings(ThirdEmbeddings(), "model", EmbeddingCache())
+    first = embeddings.embed_query("abc")
+    first[1] = -1.0
+    hit = embeddings.embed_documents(["abc", "abc"])
+    assert hit[0][1] == 3.0
+    hit[0][1] = -1.0
+    assert hit[1][1] == 3.0 and embeddings.embed_query("abc")[1] == 3.0
+
+
+def test_both_tiers_and_misses_return_float32(tmp_path):
+    store = SQLiteEmbeddingStore(str(tmp_path / "embeddings.sqlite"))
+    miss = CachedEmbeddings(ThirdEmbeddings(), "model", EmbeddingCache(store=store)).embed_documents(["abc"])
+    memory_hit = CachedEmbeddings(ThirdEmbeddings(), "model", EmbeddingCache(store=store))
+    memory_hit.embed_documents(["abc"])
+    disk_hit = CachedEmbeddings(ThirdEmbeddings(), "model", EmbeddingCache(store=store)).embed_documents(["abc"])
+    assert miss == memory_hit.embed_documents(["abc"]) == disk_hit
+    assert miss[0][0] != 1 / 3
+
+
+def test_default_path_is_in_the_project_directory():
+    assert embedding_cache.DEFAULT_CACHE_PATH == Path(__file__).resolve().parent.parent / ".cache" / "embeddings.sqlite"
@@ -0,0 +1,123 @@
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.embeddings import Embeddings
+from langchain_components import embedding_scheduler
+from langchain_components.embedding_scheduler import EmbeddingScheduler, RateLimiter
+
+
+class RecordingEmbeddings(Embeddings):
+    """Embeds a text as [len(text)] after a random delay, recording every request"""
+
+    def __init__(self):
+        self.requests = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+    async def aembed_documents(self, texts):
+        self.requests.append(list(texts))
+        await asyncio.sleep(random.random() / 100)  # finish out of order
+        return [[float(len(text))] for text in texts]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(embedding_scheduler, "count_tokens", lambda text, model: len(text.split()))
+
+
+def test_batches_respect_token_budget_and_size():
+    scheduler = EmbeddingScheduler(RecordingEmbeddings(), max_batch_tokens=5, max_batch_size=3)
+    texts = ["a b", "c d", "e", "f", "g h i j k l", "m"]
+    assert scheduler.make_batches(texts) == [([0, 1, 2], 5), ([3], 1), ([4], 6), ([5], 1)]
+
+
+def test_output_order_matches_input_order():
+    inner = RecordingEmbeddings()
+    scheduler = EmbeddingScheduler(inner, max_batch_tokens=3, max_batch_size=2, max_concurrency=4)
+    texts = ["x" * n for n in range(1, 40)]
+    assert scheduler.embed_documents(texts) == [[float(n)] for n in range(1, 40)]
+    assert len(inner.requests) == 20
+    assert sorted(text for request in inner.requests for text in request) == sorted(texts)
+
+
+def test_empty_input():
+    assert EmbeddingScheduler(RecordingEmbeddings()).embed_documents([]) == []
+
+
+def test_rate_limiter_token_window():
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=100)
+    assert limiter._try_acquire(60) == 0.0
+    assert limiter._try_acquire(60) > 0  # would exceed the token budget
+    assert limiter._try_acquire(40) == 0.0
+
+
+def test_rate_limiter_lets_oversized_request_through_when_idle():
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=100)
+    assert limiter._try_acquire(500) == 0.0
+
+
+def test_queries_go_through_the_rate_limiter():
+    scheduler = EmbeddingScheduler(RecordingEmbeddings(), requests_per_minute=2)
+    assert scheduler.embed_query("abc") == [3.0]
+    assert asyncio.run(scheduler.aembed_query("abcd")) == [4.0]
+    assert len(scheduler.rate_limiter._events) == 2
+    assert scheduler.rate_limiter._try_acquire(1) > 0
+
+
+def test_retries_use_the_scheduler_backoff(monkeypatch):
+    class Flaky(RecordingEmbeddings):
+        calls = 0
+
+        def embed_query(self, text):
+            self.calls += 1
+            if self.calls < 3:
+                raise TimeoutError("transient")
+            return super().embed_query(text)
+
+    monkeypatch.setattr(embedding_scheduler, "RETRYABLE_ERRORS", (TimeoutError,))
+    monkeypatch.setattr(embedding_scheduler.time, "sleep", lambda seconds: None)
+    inner = Flaky()
+    scheduler = EmbeddingScheduler(inner, max_retries=2)
+    assert scheduler.embed_query("ab") == [2.0]
+    assert inner.calls == 3
+    assert len(scheduler.rate_limiter._events) == 3  # every attempt is rate limited
+
+
+def test_rate_limiter_rejects_zero_limits():
+    with pytest.raises(ValueError):
+        RateLimiter(requests_per_minute=0, tokens_per_minute=100)
+
+
+def test_batch_waiting_on_the_rate_limiter_holds_no_slot():
+    scheduler = EmbeddingScheduler(RecordingEmbeddings(), max_concurrency=1)
+    acquire = scheduler.rate_limiter.acquire
+
+    async def run():
+        semaphore = asyncio.Semaphore(1)
+        throttled = asyncio.Event()
+
+        async def slow_acquire(tokens):
+            if tokens == 99:  # throttled until the other batch has been sent
+                await throttled.wait()
+            await acquire(tokens)
+
+        scheduler.rate_limiter.acquire = slow_acquire
+        waiting = asyncio.ensure_future(scheduler._embed_batch(["a"], 99, semaphore))
+        await asyncio.sleep(0)
+        sent = await asyncio.wait_for(scheduler._embed_batch(["bb"], 1, semaphore), timeout=1)
+        throttled.set()
+        return sent, await waiting
+
+    assert asyncio.run(run()) == ([[2.0]], [[1.0]])
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from langchain_components.filters import SearchFilter, utc_isoformat
+
+UTC_MINUS_5 = timezone(timedelta(hours=-5))
+NOW = datetime(2026, 3, 1, 12, 0, 0, 250000, tzinfo=timezone.utc)
+
+
+def _chunk(**metadata):
+    metadata.setdefault("uploaded_at", utc_isoformat(NOW))
+    return metadata
+
+
+def test_empty_filter():
+    assert SearchFilter().is_empty()
+    assert SearchFilter(metadata={}).is_empty()
+    assert SearchFilter().matches(_chunk())
+
+
+def test_document_and_file_type():
+    search_filter = SearchFilter(document_ids=[1, "2"], file_types=["pdf"])
+    assert search_filter.document_ids == [1, 2]
+    assert search_filter.matches(_chunk(document_id=2, file_type="pdf"))
+    assert not search_filter.matches(_chunk(document_id=3, file_type="pdf"))
+    assert not search_filter.matches(_chunk(document_id=1, file_type="txt"))
+    assert not search_filter.matches(_chunk(file_type="pdf"))
+
+
+def test_metadata_values():
+    search_filter = SearchFilter(metadata={"tenant": "acme"})
+    assert search_filter.matches(_chunk(tenant="acme"))
+    assert not search_filter.matches(_chunk(tenant="other"))
+
+
+def test_dates_are_compared_in_utc():
+    one_hour_later = (NOW + timedelta(hours=1)).astimezone(UTC_MINUS_5)
+    assert not SearchFilter(uploaded_after=one_hour_later).matches(_chunk())
+    assert SearchFilter(uploaded_before=one_hour_later).matches(_chunk())
+
+    one_hour_earlier = (NOW - timedelta(hours=1)).astimezone(UTC_MINUS_5)
+    assert SearchFilter(uploaded_after=one_hour_earlier).matches(_chunk())
+    assert not SearchFilter(uploaded_before=one_hour_earlier).matches(_chunk())
+
+
+def test_naive_dates_are_utc():
+    naive = (NOW + timedelta(minutes=1)).replace(tzinfo=None)
+    search_filter = SearchFilter(uploaded_after=naive)
+    assert search_filter.uploaded_after == NOW + timedelta(minutes=1)
+    assert not search_filter.matches(_chunk())
+
+
+def test_missing_upload_date_never_matches_a_date_filter():
+    assert not SearchFilter(uploaded_after=NOW).matches({"document_id": 1})
+
+
+def test_utc_isoformat_is_fixed_width():
+    whole_second = datetime(2026, 3, 1, 7, 0, tzinfo=UTC_MINUS_5)
+    assert utc_isoformat(whole_second) == "2026-03-01T12:00:00.000000+00:00"
+    assert utc_isoformat(whole_second) < utc_isoformat(NOW)
+
+
+def test_contains_folds_single_values():
+    assert SearchFilter(document_ids=[7], file_types=["pdf"], metadata={"tenant": "acme"}).contains() == {
+        "tenant": "acme", "document_id": 7, "file_type": "pdf",
+    }
+    assert SearchFilter(document_ids=[7, 8], file_types=["pdf", "txt"]).contains() == {}
+
+
+
+def test_collection_filter_sql():
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("psycopg2")  # database/__init__ creates the engine
+    from database.search import collection_filter_sql
+
+    assert collection_filter_sql(None) == ("TRUE", {})
+    after = datetime(2026, 1, 1, tzinfo=UTC_MINUS_5)
+    condition, params = collection_filter_sql(SearchFilter(document_ids=[1, 2], uploaded_after=after))
+    assert "AS timestamptz" in condition
+    assert params["filter_uploaded_after"] == datetime(2026, 1, 1, 5, tzinfo=timezone.utc)
+    assert params["filter_document_ids"] == ['{"document_id": 1}', '{"document_id": 2}']
+
+    condition, params = collection_filter_sql(SearchFilter(file_types=["pdf", "txt"], metadata={"tenant": "acme"}))
+    assert "->>" not in condition  # every equality is a GIN-indexable @> containment
+    assert params["filter_contains"] == '{"tenant": "acme"}'
+    assert params["filter_file_types"] == ['{"file_type": "pdf"}', '{"file_type": "txt"}']
+
+
+def test_filtered_pgvector_search_skips_pgvector_filter(monkeypatch):
+    pytest.importorskip("langchain_openai")
+    from langchain_components.embeddings import HashingEmbeddings
+    from langchain_components.vector_store import VectorStorageManager
+
+    class NativeSearch:
+        def similarity_search_by_vector(self, embedding, k, **kwargs):
+            raise AssertionError("PGVector's filter= is not GIN-indexable")
+
+    store = VectorStorageManager.__new__(VectorStorageManager)
+    store.backend, store.embeddings, store.vector_store = "pgvector", HashingEmbeddings(8), NativeSearch()
+    calls = []
+    monkeypatch.setattr(store, "_collection_knn",
+                        lambda embeddings, k, filter: calls.append((len(embeddings), k, filter)) or [["hit"]])
+
+    search_filter = SearchFilter(file_types=["pdf", "txt"])
+    assert store.similarity_search("query", k=3, filter=search_filter) == ["hit"]
+    assert calls == [(1, 3, search_filter)]
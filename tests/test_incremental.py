@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg2")  # database/__init__ creates the engine
+pytest.importorskip("langchain_openai")
+
+from langchain_components.incremental import chunk_hash, diff_chunks, updated_rows
+
+
+def _stored(*hashes):
+    """(row id, hash, chunk_index) rows with ids 100, 101, ..."""
+    return [(100 + index, content_hash, index) for index, content_hash in enumerate(hashes)]
+
+
+def test_unchanged_document_keeps_every_row():
+    diff = diff_chunks(_stored("a", "b", "c"), ["a", "b", "c"])
+    assert diff.keep == [(100, 0), (101, 1), (102, 2)]
+    assert diff.add == [] and diff.delete == []
+
+
+def test_edit_in_the_middle():
+    diff = diff_chunks(_stored("a", "b", "c"), ["a", "B", "c"])
+    assert diff.keep == [(100, 0), (102, 2)]
+    assert diff.add == [1]
+    assert diff.delete == [101]
+
+
+def test_insert_shifts_chunk_index_without_re_embedding():
+    diff = diff_chunks(_stored("a", "b"), ["new", "a", "b"])
+    assert diff.keep == [(100, 1), (101, 2)]
+    assert diff.add == [0]
+    assert diff.delete == []
+
+
+def test_removed_chunks_are_deleted():
+    diff = diff_chunks(_stored("a", "b", "c"), ["a"])
+    assert diff.keep == [(100, 0)]
+    assert sorted(diff.delete) == [101, 102]
+
+
+def test_repeated_chunks_match_in_document_order():
+    diff = diff_chunks(_stored("header", "x", "header"), ["header", "y", "header"])
+    assert diff.keep == [(100, 0), (102, 2)]
+    assert diff.add == [1]
+    assert diff.delete == [101]
+
+
+def test_extra_repeat_is_added():
+    diff = diff_chunks(_stored("header"), ["header", "header"])
+    assert diff.keep == [(100, 0)]
+    assert diff.add == [1]
+
+
+def test_empty_inputs():
+    assert diff_chunks([], ["a"]).add == [0]
+    assert diff_chunks(_stored("a"), []).delete == [100]
+
+
+def test_chunk_hash_is_content_addressed():
+    assert chunk_hash("text") == chunk_hash("text")
+    assert chunk_hash("text") != chunk_hash("text ")
+
+
+def test_kept_rows_are_updated_when_index_or_metadata_changes():
+    stored = {100: (0, {"page": 1}), 101: (1, {"page": 1}), 102: (2, {"page": 2})}
+    chunks = [("a", {"page": 1}), ("b", {"page": 2}), ("x", {}), ("c", {"page": 2})]
+    assert updated_rows(stored, [(100, 0), (101, 1), (102, 3)], chunks) == [
+        {"id": 101, "chunk_index": 1, "chunk_metadata": {"page": 2}},
+        {"id": 102, "chunk_index": 3, "chunk_metadata": {"page": 2}},
+    ]
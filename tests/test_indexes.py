@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg2")  # database/__init__ creates the engine
+
+from database import indexes
+from database.indexes import MAX_EF_SEARCH, IndexConfig
+
+
+def test_candidates_rerank_factor():
+    assert IndexConfig().candidates(10) == 10
+    assert IndexConfig(quantization="halfvec").candidates(10) == 20
+    assert IndexConfig(quantization="binary", dimensions=512).candidates(10) == 200
+
+
+def test_candidates_capped_at_max_ef_search():
+    assert IndexConfig(quantization="binary", dimensions=512).candidates(50) == MAX_EF_SEARCH
+    assert IndexConfig(quantization="binary").candidates(MAX_EF_SEARCH) == MAX_EF_SEARCH
+    with pytest.raises(ValueError):
+        IndexConfig().candidates(MAX_EF_SEARCH + 1)
+
+
+def test_ef_search_capped(monkeypatch):
+    monkeypatch.setattr(indexes, "search_index", lambda conn: IndexConfig(quantization="binary", dimensions=512))
+    config = IndexConfig(quantization="binary", dimensions=512)
+    settings = indexes.search_settings(None, "accurate", config.candidates(60))
+    assert settings == {"hnsw.ef_search": MAX_EF_SEARCH}
+    assert indexes.search_settings(None, "fast", 4) == {"hnsw.ef_search": 40}
@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("langchain_community")
+pytest.importorskip("pypdf")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg2")  # database/__init__ creates the engine
+
+from benchmarks.corpus import write_pdf
+from langchain_components import ingest
+from langchain_components.document_processor import DocumentProcessor
+
+PARAGRAPHS = [" ".join(f"word{paragraph}x{i}" for i in range(120)) for paragraph in range(12)]
+
+
+def test_parse_file_streams_pages(tmp_path, monkeypatch):
+    path = tmp_path / "sample.pdf"
+    write_pdf(path, PARAGRAPHS)
+    ingest._init_worker(300, 50)
+
+    def load_everything(self, file_path):
+        raise AssertionError("workers must not load whole files")
+
+    monkeypatch.setattr(DocumentProcessor, "load_document", load_everything)
+    content_hash, chunks = ingest._parse_file(str(path), known_hash=None)
+
+    expected = DocumentProcessor(chunk_size=300, chunk_overlap=50).iter_chunks(str(path))
+    assert chunks == [(chunk.page_content, chunk.metadata) for chunk in expected]
+    assert ingest._parse_file(str(path), known_hash=content_hash) == (content_hash, None)
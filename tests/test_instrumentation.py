@@ -0,0 +1,47 @@
+import logging
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from langchain_components import instrumentation
+from langchain_components.instrumentation import MetricsRegistry, instrument_engine, set_instrumentation
+
+
+@pytest.fixture
+def registry():
+    previous = instrumentation._current
+    registry = MetricsRegistry()
+    set_instrumentation(registry)
+    yield registry
+    set_instrumentation(previous)
+
+
+def test_slow_searches_are_explained_off_the_request_path(registry, tmp_path, monkeypatch, caplog):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    instrument_engine(engine, slow_ms=1e-9, sample_rate=1.0)
+    explainer = engine._slow_query_explainer
+    explained = []
+    monkeypatch.setattr(explainer, "explain",
+                        lambda statement, parameters, settings: explained.append((statement, settings)) or "plan")
+
+    with caplog.at_level(logging.INFO, logger=instrumentation.__name__), engine.connect() as conn:
+        executed = []
+        sqlalchemy.event.listen(engine, "before_cursor_execute", lambda *args: executed.append(args[2]))
+        conn.execute(sqlalchemy.text("SELECT '<->' AS distance"))
+        explainer.pending.join()
+
+    assert explained == [("SELECT '<->' AS distance", [])]
+    assert executed == ["SELECT '<->' AS distance"]  # nothing else ran on the caller's connection
+    assert registry.slow_queries[0]["plan"] == "plan"
+    assert "Slow vector search" in caplog.text
+    assert any(key.startswith("{kind=\"vector_search\"") for key in registry.snapshot()["spans"])
+
+
+def test_metrics_listen_on_loopback_by_default():
+    server = instrumentation.serve_metrics(MetricsRegistry(), 0)
+    try:
+        assert server.server_address[0] == "127.0.0.1"
+    finally:
+        server.shutdown()
+        server.server_close()
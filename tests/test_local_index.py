@@ -0,0 +1,131 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+from langchain_components.filters import SearchFilter
+from langchain_components.local_index import LocalVectorStore
+
+
+def _docs(*names):
+    return [Document(page_content=f"text {name}", metadata={"name": name}) for name in names]
+
+
+def _vectors(n, dimensions=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dimensions)).tolist()
+
+
+def test_append_and_reopen(tmp_path):
+    store = LocalVectorStore(str(tmp_path), embeddings=None)
+    vectors = _vectors(3)
+    store.add_embeddings(_docs("a", "b"), vectors[:2])
+    store.add_embeddings(_docs("c"), vectors[2:])
+
+    reopened = LocalVectorStore(str(tmp_path), embeddings=None)
+    assert reopened.count == 3
+    assert [doc.metadata["name"] for doc in reopened.get_documents([0, 1, 2])] == ["a", "b", "c"]
+    for row, vector in enumerate(vectors):
+        assert reopened.search_vectors([vector], k=1)[0][0][0] == row
+
+
+def test_reopen_keeps_float16(tmp_path):
+    LocalVectorStore(str(tmp_path), embeddings=None, dtype="float16").add_embeddings(_docs("a"), _vectors(1))
+    reopened = LocalVectorStore(str(tmp_path), embeddings=None)
+    assert reopened.dtype == "float16"
+    assert reopened.get_vectors([0]).shape == (1, 8)
+
+
+def test_crash_mid_append_is_truncated_on_open(tmp_path):
+    store = LocalVectorStore(str(tmp_path), embeddings=None)
+    store.add_embeddings(_docs("a", "b"), _vectors(2))
+
+    # An append that wrote part of its data and crashed before updating the header
+    with open(tmp_path / "records.jsonl", "ab") as records:
+        records.write(b'{"id": "lost", "page_content": "half a li')
+    with open(tmp_path / "offsets.i64", "ab") as offsets:
+        offsets.write(np.asarray([12345], dtype=np.int64).tobytes())
+    with open(tmp_path / "vectors.f32", "ab") as vectors:
+        vectors.write(np.ones(5, dtype=np.float32).tobytes())
+
+    reopened = LocalVectorStore(str(tmp_path), embeddings=None)
+    assert reopened.count == 2
+    reopened.add_embeddings(_docs("c"), _vectors(1, seed=1))
+
+    again = LocalVectorStore(str(tmp_path), embeddings=None)
+    assert [doc.metadata["name"] for doc in again.get_documents([0, 1, 2])] == ["a", "b", "c"]
+    assert again.matching_rows(lambda metadata: True).tolist() == [0, 1, 2]
+    assert again.matching_rows(lambda metadata: metadata["name"] == "c").tolist() == [2]
+    assert (tmp_path / "vectors.f32").stat().st_size == 3 * 8 * 4
+    assert json.loads((tmp_path / "index.json").read_text())["records_bytes"] == \
+        (tmp_path / "records.jsonl").stat().st_size
+
+
+def test_filtered_search_only_scores_matching_rows(tmp_path):
+    store = LocalVectorStore(str(tmp_path), embeddings=None)
+    vectors = _vectors(10)
+    store.add_embeddings(_docs(*range(10)), vectors)
+    rows = store.matching_rows(lambda metadata: metadata["name"] % 2 == 1)
+    hits = store.search_vectors([vectors[0]], k=3, rows=rows)[0]
+    assert len(hits) == 3
+    assert all(row % 2 == 1 for row, _ in hits)
+
+
+def test_storage_version_sees_appends_by_other_instances(tmp_path):
+    reader = LocalVectorStore(str(tmp_path), embeddings=None)
+    assert reader.storage_version() == "0"
+    writer = LocalVectorStore(str(tmp_path), embeddings=None)
+    writer.add_embeddings(_docs("a"), _vectors(1))
+    first = reader.storage_version()
+    assert first.startswith("1:")
+    LocalVectorStore(str(tmp_path), embeddings=None).add_embeddings(_docs("b"), _vectors(1, seed=1))
+    assert reader.storage_version() != first
+
+
+def test_search_filter_is_answered_from_memory(tmp_path, monkeypatch):
+    docs = [
+        Document(page_content=f"text {i}", metadata={
+            "document_id": i % 3, "file_type": ["pdf", "txt"][i % 2], "tenant": "acme" if i < 6 else "other",
+            "uploaded_at": f"2026-03-0{1 + i % 4}T12:00:00.000000+00:00",
+        })
+        for i in range(10)
+    ]
+    docs[9].metadata.pop("uploaded_at")
+    store = LocalVectorStore(str(tmp_path), embeddings=None)
+    store.add_embeddings(docs[:8], _vectors(8))
+
+    filters = [
+        SearchFilter(document_ids=[0, 2], file_types=["pdf"]),
+        SearchFilter(metadata={"tenant": "other"}),
+        SearchFilter(metadata={"tenant": None}),
+        SearchFilter(uploaded_after=datetime(2026, 3, 2, 12), uploaded_before=datetime(2026, 3, 3, 12)),
+        SearchFilter(file_types=["docx"]),
+    ]
+    store.matching_rows(filters[0])  # the first filtered search reads the metadata once
+
+    def read_metadata(start, end):
+        raise AssertionError("filtered searches must not read records.jsonl again")
+
+    monkeypatch.setattr(store, "_read_metadata", read_metadata)
+    store.add_embeddings(docs[8:], _vectors(2, seed=1))
+    for search_filter in filters:
+        expected = [row for row, doc in enumerate(docs) if search_filter.matches(doc.metadata)]
+        assert store.matching_rows(search_filter).tolist() == expected
+
+
+
+def test_instances_sharing_a_directory_see_each_others_appends(tmp_path):
+    first = LocalVectorStore(str(tmp_path), embeddings=None)
+    second = LocalVectorStore(str(tmp_path), embeddings=None)
+    vectors = _vectors(3)
+    first.add_embeddings(_docs("a"), vectors[:1])
+    second.add_embeddings(_docs("b"), vectors[1:2])  # stale: opened before "a"
+    first.add_embeddings(_docs("c"), vectors[2:])
+
+    assert second.search_vectors([vectors[2]], k=1)[0][0][0] == 2
+    assert second.matching_rows(lambda metadata: metadata["name"] == "c").tolist() == [2]
+    reopened = LocalVectorStore(str(tmp_path), embeddings=None)
+    assert [doc.metadata["name"] for doc in reopened.get_documents([0, 1, 2])] == ["a", "b", "c"]
@@ -0,0 +1,87 @@
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from langchain_components import context_builder
+from langchain_components.answer_cache import SemanticAnswerCache
+from langchain_components.context_builder import ContextBuilder
+from langchain_components.embeddings import HashingEmbeddings
+from langchain_components.filters import SearchFilter
+from langchain_components.rag_chain import RAGChain
+from langchain_components.vector_store import VectorStorageManager
+
+TEXTS = [
+    "Pgvector adds vector similarity search to Postgres.",
+    "Pgvector supports HNSW and IVFFlat indexes for approximate search.",
+    "HNSW indexes trade memory for fast approximate nearest neighbour search.",
+    "Reciprocal rank fusion combines lexical and vector rankings.",
+    "Tiktoken counts tokens for OpenAI models.",
+    "The answer cache returns stored answers for similar questions.",
+]
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")  # ChatOpenAI is built but never called
+    monkeypatch.setattr(context_builder, "count_tokens", lambda text, model: len(text.split()))
+    store = VectorStorageManager(backend="local", embeddings=HashingEmbeddings(256), index_path=str(tmp_path))
+    store.add_documents(TEXTS, [{"source": f"doc{i}.txt"} for i in range(len(TEXTS))])
+    return RAGChain(store, context_builder=ContextBuilder(token_budget=40, fetch_k=5))
+
+
+def test_batch_context_matches_single_query_context(rag):
+    questions = ["What indexes does pgvector support?", "How are rankings fused?", "What counts tokens?"]
+    single = [rag._retrieve_context(question, 2) for question in questions]
+    assert rag._retrieve_batch(questions, 2, max_concurrency=2) == single
+    assert all(single)
+
+
+def test_batch_search_applies_filter(rag):
+    store = rag.vector_store
+    only = SearchFilter(metadata={"source": "doc4.txt"})
+    questions = ["What indexes does pgvector support?", "What counts tokens?"]
+    batch = store.similarity_search_batch(questions, k=3, filter=only)
+    single = [store.similarity_search(question, k=3, filter=only) for question in questions]
+    assert [[doc.page_content for doc in docs] for docs in batch] == \
+           [[doc.page_content for doc in docs] for docs in single]
+    assert all(doc.metadata["source"] == "doc4.txt" for docs in batch for doc in docs)
+
+
+class EchoChain:
+    """Stands in for prompt | llm | parser: answers with the question, records each batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        self.batches.append([item["question"] for item in inputs])
+        return [f"answer to {item['question']}" for item in inputs]
+
+
+def test_batch_keeps_retrieval_errors_per_question(rag, monkeypatch):
+    rag.chain = EchoChain()
+    retrieve_context = rag._retrieve_context
+
+    def flaky(question, k, embedding=None, filter=None):
+        if question == "broken":
+            raise RuntimeError("boom")
+        return retrieve_context(question, k, embedding, filter)
+
+    monkeypatch.setattr(rag, "_retrieve_context", flaky)
+    results = rag.query_batch(["What indexes does pgvector support?", "broken", "What counts tokens?"], k=2)
+
+    assert [result.error for result in results] == [None, "retrieval failed: boom", None]
+    assert results[2].answer == "answer to What counts tokens?"
+    assert rag.chain.batches == [["What indexes does pgvector support?", "What counts tokens?"]]
+
+
+def test_batch_uses_the_answer_cache(rag):
+    rag.chain = EchoChain()
+    rag.answer_cache = SemanticAnswerCache(threshold=0.99)
+    first = rag.query_batch(["What indexes does pgvector support?", "What counts tokens?"], k=2)
+    second = rag.query_batch(["What counts tokens?", "How are rankings fused?"], k=2)
+
+    assert [result.answer for result in second] == ["answer to What counts tokens?", "answer to How are rankings fused?"]
+    assert second[0].answer == first[1].answer
+    assert rag.chain.batches[-1] == ["How are rankings fused?"]
+